@@ -0,0 +1,161 @@
+"""Generators of reproducible benchmark instances.
+
+Every generator takes a seeded random.Random, the size of the instance and
+the time limit written in its first line, and returns text of the input in
+the format read by main of the task.
+"""
+import math
+import string
+
+
+MATCH_VALS = [0, 32, 64, 128, 160, 192, 223, 255]
+
+
+def function_instance(rng, size, time_limit, function=0):
+    """Input of l1/z1: time limit and the function (0 for HappyCat, 1 for Griewank)."""
+    return f'{time_limit} {function}\n'
+
+
+def salomon_instance(rng, size, time_limit):
+    """Input of l2/z1: time limit and integer starting point of Salomon function."""
+    point = [rng.randint(-size, size) for _ in range(4)]
+    return f"{time_limit} {' '.join(map(str, point))}\n"
+
+
+def yang_instance(rng, size, time_limit):
+    """Input of l3/z1: time limit, starting point and coefficients of Yang function."""
+    point = [rng.randint(-5, 5) for _ in range(5)]
+    coefs = [rng.random() for _ in range(5)]
+    return f"{time_limit} {' '.join(map(str, point + coefs))}\n"
+
+
+def tsp_random_instance(rng, size, time_limit):
+    """Input of l1/z2: symmetric matrix of random distances between size cities."""
+    grid = [[0]*size for _ in range(size)]
+    for i in range(size):
+        for j in range(i+1, size):
+            grid[i][j] = grid[j][i] = rng.randint(1, 1000)
+    return _tsp_text(grid, time_limit)
+
+
+def tsp_euclidean_instance(rng, size, time_limit):
+    """Input of l1/z2: matrix of rounded distances between size random points on a plane."""
+    points = [(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in range(size)]
+    grid = [[round(math.dist(p, q)) for q in points] for p in points]
+    return _tsp_text(grid, time_limit)
+
+
+def _tsp_text(grid, time_limit):
+    rows = [' '.join(map(str, row)) for row in grid]
+    return f'{time_limit} {len(grid)}\n' + '\n'.join(rows) + '\n'
+
+
+def maze_grid(rng, size):
+    """Generate maze of (2*size + 1) x (2*size + 1) fields as list of rows of field values.
+
+    The maze is carved by randomized depth-first search and then some walls
+    are removed, so there are many paths of different lengths. The agent
+    stands in the upper left corner and the exit is in the right border.
+    """
+    n = m = 2*size + 1
+    grid = [[1]*m for _ in range(n)]
+    grid[1][1] = 0
+    stack = [(1, 1)]
+    while stack:
+        i, j = stack[-1]
+        steps = [(di, dj) for di, dj in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                 if 0 < i+di < n-1 and 0 < j+dj < m-1 and grid[i+di][j+dj] == 1]
+        if not steps:
+            stack.pop()
+            continue
+        di, dj = rng.choice(steps)
+        grid[i + di//2][j + dj//2] = 0
+        grid[i+di][j+dj] = 0
+        stack.append((i+di, j+dj))
+    for _ in range(n*m // 10):
+        grid[rng.randrange(1, n-1)][rng.randrange(1, m-1)] = 0
+    grid[1][1] = 5
+    grid[n-2][m-1] = 8
+    return grid
+
+
+def maze_path(rng, grid):
+    """Find random path from the agent to the exit by depth-first search.
+
+    The path is a string of U, D, L and R moves.
+    """
+    start = next((i, row.index(5)) for i, row in enumerate(grid) if 5 in row)
+    moves = {'U': (-1, 0), 'D': (1, 0), 'L': (0, -1), 'R': (0, 1)}
+    visited = {start}
+    stack = [(start, '')]
+    while stack:
+        (i, j), path = stack.pop()
+        if grid[i][j] == 8:
+            return path
+        directions = list(moves.items())
+        rng.shuffle(directions)
+        for name, (di, dj) in directions:
+            field = (i+di, j+dj)
+            if field not in visited and grid[field[0]][field[1]] != 1:
+                visited.add(field)
+                stack.append((field, path + name))
+    raise ValueError('Exit cannot be reached')
+
+
+def maze_instance(rng, size, time_limit):
+    """Input of l1/z3 and l2/z3: maze grid."""
+    grid = maze_grid(rng, size)
+    return _maze_text(grid, f'{time_limit} {len(grid)} {len(grid[0])}')
+
+
+def maze_genetic_instance(rng, size, time_limit, initial=4, population=20):
+    """Input of l3/z3: maze grid and initial paths for Genetic Algorithm."""
+    grid = maze_grid(rng, size)
+    paths = [maze_path(rng, grid) for _ in range(initial)]
+    header = f'{time_limit} {len(grid)} {len(grid[0])} {initial} {population}'
+    return _maze_text(grid, header) + '\n'.join(paths) + '\n'
+
+
+def _maze_text(grid, header):
+    return header + '\n' + '\n'.join(''.join(map(str, row)) for row in grid) + '\n'
+
+
+def matrix_instance(rng, size, time_limit, k=3):
+    """Input of l2/z2: noisy image of size x size blocks of k x k fields.
+
+    Every block has one of the matching values and every field deviates
+    from it by random noise.
+    """
+    n = m = size*k
+    blocks = [[rng.choice(MATCH_VALS) for _ in range(size)] for _ in range(size)]
+    rows = []
+    for i in range(n):
+        row = [blocks[i//k][j//k] + rng.randint(-20, 20) for j in range(m)]
+        rows.append(' '.join(str(min(max(u, 0), 255)) for u in row))
+    return f'{time_limit} {n} {m} {k}\n' + '\n'.join(rows) + '\n'
+
+
+def letters_instance(rng, size, time_limit, words=2000):
+    """Input of l3/z2 and its dictionary: multiset of size letters with points.
+
+    Return text of the input and text of the dictionary. The dictionary has
+    random words, some of them made of letters of the multiset, and the
+    initial words are taken from those.
+    """
+    alphabet = string.ascii_lowercase[:12]
+    letters = [rng.choice(alphabet) for _ in range(size)]
+    points = {letter: rng.randint(1, 10) for letter in alphabet}
+    dictionary = set()
+    while len(dictionary) < words:
+        if rng.random() < 0.5:
+            word = ''.join(rng.sample(letters, rng.randint(2, size)))
+        else:
+            word = ''.join(rng.choice(alphabet) for _ in range(rng.randint(2, size)))
+        dictionary.add(word)
+    dictionary = sorted(dictionary)
+    initial = [''.join(rng.sample(letters, rng.randint(2, size))) for _ in range(4)]
+    dictionary.extend(word for word in initial if word not in dictionary)
+    lines = [f'{time_limit} {size} {len(initial)}']
+    lines.extend(f'{letter} {points[letter]}' for letter in letters)
+    lines.extend(initial)
+    return '\n'.join(lines) + '\n', '\n'.join(dictionary) + '\n'
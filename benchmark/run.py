@@ -0,0 +1,147 @@
+"""Benchmark of all solvers on generated instances.
+
+Every task is run as a separate process with its main reading the generated
+input, once for every seed. The seed is passed in METAHEURISTIC_SEED, so
+both the instance and the run are reproducible, and the summary of solver
+counters is collected through METAHEURISTIC_STATS. Budgets of evaluations
+or iterations are passed to the termination policy of the solvers; with a
+budget and a time limit long enough the run does not depend on speed of the
+machine. One JSON line per run
+with the quality of the result, wall time and throughput is appended to the
+output file, so results of different versions can be compared.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+import instances
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+from common.termination import MAX_EVALUATIONS_ENV, MAX_ITERATIONS_ENV
+
+
+@dataclass
+class Task:
+    """Benchmarked solver with the generator of its instances."""
+    name: str
+    script: str
+    generator: object
+    size: int
+    goal: str = 'min'
+    args: list = field(default_factory=list)
+
+
+TASKS = [
+    Task('l1z1-happycat', 'l1/z1/localsearch.py', instances.function_instance, 4),
+    Task('l1z1-griewank', 'l1/z1/localsearch.py',
+         lambda rng, size, t: instances.function_instance(rng, size, t, 1), 4),
+    Task('l1z2-random', 'l1/z2/tsp.py', instances.tsp_random_instance, 100),
+    Task('l1z2-euclidean', 'l1/z2/tsp.py', instances.tsp_euclidean_instance, 100),
+    Task('l1z3', 'l1/z3/tabusearch.py', instances.maze_instance, 10,
+         args=['--gap', '--construction', 'bfs']),
+    Task('l2z1', 'l2/z1/salomon_sa.py', instances.salomon_instance, 100),
+    Task('l2z2', 'l2/z2/main.py', instances.matrix_instance, 10),
+    Task('l2z3', 'l2/z3/escape.py', instances.maze_instance, 10, args=['--gap']),
+    Task('l3z1', 'l3/z1/yang_pso.py', instances.yang_instance, 5),
+    Task('l3z2', 'l3/z2/main.py', instances.letters_instance, 10, goal='max'),
+    Task('l3z3', 'l3/z3/escape.py', instances.maze_genetic_instance, 10, args=['--gap']),
+]
+
+
+def run(task, seed, time_limit, size=None, timeout=None, max_evaluations=None,
+        max_iterations=None):
+    """Run task on the instance generated with seed and return record of the run.
+
+    - max_evaluations -- budget of objective evaluations of the solver
+    - max_iterations -- budget of iterations of the solver
+    """
+    size = size or task.size
+    rng = random.Random(f'{task.name}:{seed}')
+    text = task.generator(rng, size, time_limit)
+    with tempfile.TemporaryDirectory() as directory:
+        args = list(task.args)
+        if isinstance(text, tuple):
+            text, dictionary = text
+            args.append(os.path.join(directory, 'dict.txt'))
+            with open(args[-1], 'w') as file:
+                file.write(dictionary)
+        stats_file = os.path.join(directory, 'stats.json')
+        env = dict(os.environ, METAHEURISTIC_SEED=str(seed), METAHEURISTIC_STATS=stats_file,
+                   PYTHONHASHSEED='0')
+        for name, value in ((MAX_EVALUATIONS_ENV, max_evaluations),
+                            (MAX_ITERATIONS_ENV, max_iterations)):
+            if value is not None:
+                env[name] = str(value)
+        start = time.time()
+        try:
+            process = subprocess.run([sys.executable, os.path.join(ROOT, task.script), *args],
+                                     input=text, capture_output=True, text=True, env=env,
+                                     cwd=os.path.dirname(os.path.join(ROOT, task.script)),
+                                     timeout=timeout or 2*time_limit + 10)
+            returncode = process.returncode
+            output = process.stdout.split()
+        except subprocess.TimeoutExpired:
+            returncode = None
+            output = []
+        wall_time = time.time() - start
+        stats = {}
+        if os.path.exists(stats_file):
+            with open(stats_file) as file:
+                stats = json.loads(file.readline())
+
+    record = {
+        'task': task.name,
+        'seed': seed,
+        'size': size,
+        'time_limit': time_limit,
+        'max_evaluations': max_evaluations,
+        'max_iterations': max_iterations,
+        'goal': task.goal,
+        'returncode': returncode,
+        'quality': float(output[-1]) if returncode == 0 and output else None,
+        'wall_time': wall_time,
+    }
+    for key in ('evaluations', 'iterations', 'elapsed', 'evaluations_per_second',
+                'iterations_per_second', 'phases', 'resumed_walks', 'optimum', 'gap'):
+        record[key] = stats.get(key)
+    return record
+
+
+def main():
+    '''Main function of the package'''
+    parser = argparse.ArgumentParser(description='Benchmark all solvers on generated instances')
+    parser.add_argument('--tasks', nargs='+', choices=[task.name for task in TASKS],
+                        help='tasks to run (all by default)')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2],
+                        help='seeds of instances and runs')
+    parser.add_argument('--time-limit', type=int, default=2,
+                        help='time limit of every run in seconds')
+    parser.add_argument('--size', type=int, help='size of instances instead of the defaults')
+    parser.add_argument('--max-evaluations', type=int,
+                        help='budget of objective evaluations of every run')
+    parser.add_argument('--max-iterations', type=int, help='budget of iterations of every run')
+    parser.add_argument('--output', default='benchmark.jsonl',
+                        help='file to append JSON line of every run to')
+    args = parser.parse_args()
+
+    tasks = [task for task in TASKS if not args.tasks or task.name in args.tasks]
+    with open(args.output, 'a') as file:
+        for task in tasks:
+            for seed in args.seeds:
+                record = run(task, seed, args.time_limit, args.size,
+                             max_evaluations=args.max_evaluations,
+                             max_iterations=args.max_iterations)
+                print(json.dumps(record), file=file, flush=True)
+                print(f"{task.name} seed={seed} quality={record['quality']} "
+                      f"it/s={record['iterations_per_second']}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
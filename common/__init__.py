@@ -0,0 +1 @@
+"""Common building blocks shared by the solvers of all lists."""
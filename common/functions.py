@@ -0,0 +1,59 @@
+"""Benchmark functions for continuous optimization.
+
+Every function takes a single point x (1-D array-like of any dimension)
+and returns its value, or a batch of points in rows of 2-D array and
+returns an array of values.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def happycat(x):
+    """Calculate HappyCat function value in point x."""
+    x = np.asarray(x, dtype=float)
+    d = x.shape[-1]
+    norm = (x*x).sum(axis=-1)
+    return 0.5 + ((norm - d)**2)**(1/8) + (norm/2 + x.sum(axis=-1))/d
+
+
+def griewank(x):
+    """Calculate Griewank function value in point x."""
+    x = np.asarray(x, dtype=float)
+    d = x.shape[-1]
+    s = (x*x).sum(axis=-1)/4000
+    prod = np.cos(x/np.sqrt(np.arange(1, d+1))).prod(axis=-1)
+    return 1 + s - prod
+
+
+def salomon(x):
+    """Calculate Salomon function value in point x."""
+    x = np.asarray(x, dtype=float)
+    norm = np.sqrt((x*x).sum(axis=-1))
+    return 1 - np.cos(2*np.pi*norm) + 0.1*norm
+
+
+def yang(x, coefs=1.0):
+    """Calculate X. S. Yang function value in point x with given coefficients."""
+    x = np.asarray(x, dtype=float)
+    return (coefs*np.abs(x)).sum(axis=-1)
+
+
+@dataclass
+class Benchmark:
+    """Benchmark function with its known global minimum."""
+    function: callable
+    coordinate: float
+    value: float = 0.0
+
+    def optimum(self, dimension):
+        """Return point and value of the global minimum in given dimension."""
+        return np.full(dimension, self.coordinate), self.value
+
+
+BENCHMARKS = {
+    'happycat': Benchmark(happycat, -1.0),
+    'griewank': Benchmark(griewank, 0.0),
+    'salomon': Benchmark(salomon, 0.0),
+    'yang': Benchmark(yang, 0.0),
+}
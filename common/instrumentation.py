@@ -0,0 +1,108 @@
+"""Instrumentation of solvers.
+
+Counts objective evaluations, iterations, accepted moves and improvements,
+and measures time of solver phases, so runs of different versions and
+configurations can be compared by their throughput.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+STATS_ENV = 'METAHEURISTIC_STATS'
+
+
+class Stats:
+    """Counters and phase timers of a single solver run."""
+
+    def __init__(self, solver):
+        """Create new instance with zeroed counters.
+
+        - solver -- name of the solver reported in the summary
+        """
+        self.solver = solver
+        self.evaluations = 0
+        self.iterations = 0
+        self.accepted = 0
+        self.improvements = 0
+        self.phases = {}
+        self.counters = {}
+        self.results = {}
+        self.start_time = time.perf_counter()
+
+    def count(self, function):
+        """Return function counting its evaluations.
+
+        A call with 2-D array counts as evaluation of every row.
+        """
+        def counted(x, *args, **kwargs):
+            self.evaluations += len(x) if np.ndim(x) == 2 else 1
+            return function(x, *args, **kwargs)
+        return counted
+
+    @contextmanager
+    def phase(self, name):
+        """Measure time spent in the block as the phase of given name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def add(self, name, value=1):
+        """Add value to the named counter of solver-specific events reported in the summary."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def result(self, name, value):
+        """Record value describing the result (e.g. its optimality gap) for the summary."""
+        self.results[name] = value
+
+    def merge(self, other):
+        """Add counters and phase times of other run (e.g. of a worker process)."""
+        self.evaluations += other.evaluations
+        self.iterations += other.iterations
+        self.accepted += other.accepted
+        self.improvements += other.improvements
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0) + seconds
+        for name, value in other.counters.items():
+            self.add(name, value)
+
+    def summary(self):
+        """Return dict with counters, time and throughput of the run."""
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            'solver': self.solver,
+            'elapsed': elapsed,
+            'evaluations': self.evaluations,
+            'iterations': self.iterations,
+            'accepted': self.accepted,
+            'improvements': self.improvements,
+            'evaluations_per_second': self.evaluations / elapsed if elapsed else 0.0,
+            'iterations_per_second': self.iterations / elapsed if elapsed else 0.0,
+            'phases': dict(self.phases),
+            **self.counters,
+            **self.results,
+        }
+
+    def report(self, path=None):
+        """Report summary of the run.
+
+        - path -- file to append the summary to as a JSON line, or '-' to
+            print it to stderr; taken from METAHEURISTIC_STATS environment
+            variable if not given, nothing is reported if it is not set
+        """
+        path = path or os.environ.get(STATS_ENV)
+        if not path:
+            return
+        summary = self.summary()
+        if path == '-':
+            for key, value in summary.items():
+                print(f'{key}: {value}', file=sys.stderr)
+        else:
+            with open(path, 'a') as file:
+                print(json.dumps(summary), file=file)
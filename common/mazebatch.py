@@ -0,0 +1,140 @@
+"""Batch solving of many mazes in a process pool.
+
+Instances in the input format of a maze task follow one another in one file
+or stream. Every agent of every maze is a separate job searching the path
+from its field to any exit of the maze, and results are generated in the
+order the jobs finish, so they can be written at once.
+"""
+import multiprocessing
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from common.instrumentation import Stats
+from common.mazegrid import AGENT, MazeGrid, UnreachableExit, parse_grid
+from common.seeding import seed_generators
+
+
+@dataclass
+class MazeInstance:
+    """Maze read from the batch input.
+
+    maze is the MazeGrid shared by jobs of all agents, with distances to
+    exits computed once before the jobs are run.
+    """
+    header: list
+    grid: np.ndarray
+    extra: list
+    maze: Optional[MazeGrid] = None
+
+    def agents(self):
+        """Return (row, column) of every agent in the maze."""
+        return [(int(i), int(j)) for i, j in np.argwhere(self.grid == AGENT)]
+
+
+def read_instances(file, extra_lines=None):
+    """Generate MazeInstances from the binary file one after another.
+
+    Every instance is a header line of integers (time limit, rows, columns,
+    ...), rows of the grid and extra lines (e.g. initial paths); blank lines
+    between instances are skipped.
+    - extra_lines -- function of the header returning the number of extra
+        lines, there are none if not given
+    """
+    lines = iter(file)
+    for line in lines:
+        if not line.strip():
+            continue
+        header = list(map(int, line.split()))
+        rows = b''.join(next(lines) for _ in range(header[1]))
+        grid = parse_grid(rows, header[1], header[2])[0]
+        extra = [next(lines).decode().strip() for _ in range(extra_lines(header))] if extra_lines else []
+        yield MazeInstance(header, grid, extra)
+
+
+def job_grid(instance, agent):
+    """Return MazeGrid of the instance starting from the agent.
+
+    The grid shares fields, distances to exits and reaches with the maze of
+    the instance, if it has one.
+    Raise UnreachableExit if no exit can be reached from the agent, before
+    any construction of paths can walk forever.
+    """
+    grid = instance.maze.moved(agent) if instance.maze is not None else MazeGrid(instance.grid, agent)
+    if not grid.reachable():
+        raise UnreachableExit('Exit cannot be reached')
+    return grid
+
+
+def solve_batch(solve, instances, workers=None, seed=None):
+    """Solve every agent of every instance in a process pool.
+
+    - solve -- picklable function of MazeInstance and (row, column) of the
+        agent returning result of the job; it should build the grid of the
+        job by job_grid()
+    - workers -- number of processes, all CPU cores by default
+    - seed -- random generators of the k-th job are seeded with seed + k,
+        so results do not depend on the order in which jobs are run
+    Distances to exits of every maze are computed once, before its jobs.
+    Generate (index of instance, index of agent, result) as jobs finish.
+    """
+    jobs = ((solve, i, k, instance, agent)
+            for i, instance in enumerate(map(_share_maze, instances))
+            for k, agent in enumerate(instance.agents()))
+    jobs = ((*job, None if seed is None else seed + number) for number, job in enumerate(jobs))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_run_job, jobs)
+
+
+def write_results(results, stats, file=sys.stdout):
+    """Write line 'instance agent cost path' of every result as it comes.
+
+    Results of jobs are (cost, path as string of moves, Stats of the job).
+    Their counters are merged into stats, which also records the number of
+    jobs and the mean gap of those which recorded it.
+    """
+    jobs = 0
+    gaps = []
+    for i, k, (cost, path, job_stats) in results:
+        print(i, k, cost, path, file=file, flush=True)
+        jobs += 1
+        stats.merge(job_stats)
+        if 'gap' in job_stats.results:
+            gaps.append(job_stats.results['gap'])
+    stats.result('jobs', jobs)
+    if gaps:
+        stats.result('gap', sum(gaps)/len(gaps))
+
+
+def _share_maze(instance):
+    """Return the instance with its maze built and distances to exits computed."""
+    agents = instance.agents()
+    if agents and instance.maze is None:
+        instance.maze = MazeGrid(instance.grid, agents[0])
+        instance.maze.distances()
+    return instance
+
+
+_last = None
+
+
+def _run_job(job):
+    """Run job in pool worker and return its indices with the result.
+
+    The worker keeps the instance of its last job, so reaches computed for
+    one agent are used by the next agents of the same maze.
+    A maze whose exit cannot be reached is reported with infinite cost.
+    """
+    global _last
+    solve, i, k, instance, agent, seed = job
+    if _last is not None and _last[0] == i:
+        instance = _last[1]
+    _last = i, instance
+    if seed is not None:
+        seed_generators(seed)
+    try:
+        return i, k, solve(instance, agent)
+    except UnreachableExit:
+        return i, k, (float('inf'), '-', Stats('unsolved'))
@@ -0,0 +1,384 @@
+"""Compact maze grid shared by the maze escape solvers.
+
+Fields are stored in one flat array of bytes indexed linearly and surrounded
+by a border of walls, so a move is an addition of the offset of its direction
+and leaving the grid means hitting a wall like any other. Directions are
+coded as in enums of the maze tasks (up 0, left 1, down 2, right 3), and since
+Directions are bytes, a path of them is coded by b''.join(path).
+"""
+import copy
+import random
+from array import array
+from itertools import chain
+
+import numpy as np
+
+
+NORMAL = 0
+WALL = 1
+AGENT = 5
+EXIT = 8
+
+# layers of breadth-first search with fewer fields are not expanded by NumPy
+SMALL_LAYER = 64
+
+
+class UnreachableExit(ValueError):
+    """No exit of the maze can be reached from the field."""
+
+
+class MazeGrid:
+    """Maze fields in a flat uint8 array with precomputed offsets of moves."""
+
+    def __init__(self, grid, start=None, exit=None):
+        """Create grid from rows of field values, Field members or 2-D array.
+
+        - start -- (row, column) of the agent, found in the grid if not given
+            (ValueError is raised if there is no agent)
+        - exit -- (row, column) of the exit, the first one in the grid (or
+            None if there is none) if not given; walks end at any exit
+        """
+        if not isinstance(grid, np.ndarray):
+            grid = [[getattr(u, 'value', u) for u in row] for row in grid]
+        grid = np.asarray(grid, dtype=np.uint8)
+        self.rows, self.cols = grid.shape
+        self.width = self.cols + 2
+        padded = np.full((self.rows + 2, self.width), WALL, dtype=np.uint8)
+        padded[1:-1, 1:-1] = grid
+        self.fields = padded.ravel()
+        self.cells = self.fields.tobytes()
+        self.offsets = (-self.width, -1, self.width, 1)
+        self.exits = np.flatnonzero(self.fields == EXIT)
+        if start is not None:
+            self.start = self.index(*start)
+        else:
+            agents = np.flatnonzero(self.fields == AGENT)
+            if not len(agents):
+                raise ValueError('Grid has no agent')
+            self.start = int(agents[0])
+        if exit is not None:
+            self.exit = self.index(*exit)
+        else:
+            self.exit = int(self.exits[0]) if len(self.exits) else None
+        self._cache = {}
+
+    def moved(self, start):
+        """Return grid of the same maze with the agent at start (row, column).
+
+        Both grids share their fields, and the distance field and reaches
+        computed by either of them, since these do not depend on the agent.
+        """
+        grid = copy.copy(self)
+        grid.start = self.index(*start)
+        return grid
+
+    def index(self, i, j):
+        """Return linear index of the field in i-th row and j-th column."""
+        return (i + 1)*self.width + j + 1
+
+    def position(self, index):
+        """Return (row, column) of the field with linear index."""
+        i, j = divmod(index, self.width)
+        return i - 1, j - 1
+
+    def field(self, i, j):
+        """Return value of the field in i-th row and j-th column."""
+        return self.cells[self.index(i, j)]
+
+    def exit_move(self, index):
+        """Return code of the move from the field with index to an exit, or None."""
+        for code, offset in enumerate(self.offsets):
+            if self.cells[index + offset] == EXIT:
+                return code
+        return None
+
+    def walk(self, codes, stop_at_exit=False):
+        """Walk path of direction codes from the start.
+
+        Return index of the reached field and number of moves walked, which
+        is less than len(codes) only if the walk stopped at an exit, or None
+        if the path goes through a wall.
+        """
+        cells = self.cells
+        offsets = self.offsets
+        point = self.start
+        if not stop_at_exit:
+            for code in codes:
+                point += offsets[code]
+                if cells[point] == WALL:
+                    return None
+            return point, len(codes)
+
+        for k, code in enumerate(codes):
+            point += offsets[code]
+            field = cells[point]
+            if field == WALL:
+                return None
+            if field == EXIT:
+                return point, k + 1
+        return point, len(codes)
+
+    def positions(self, codes):
+        """Return array of linear indices of fields reached after each move of the path.
+
+        Walls are not checked.
+        """
+        moves = np.asarray(self.offsets, dtype=np.intp)[np.frombuffer(bytes(codes), dtype=np.uint8)]
+        return np.cumsum(moves) + self.start
+
+    def walk_batch(self, paths, stop_at_exit=False):
+        """Walk many RunPaths from the start at once.
+
+        Runs of all paths are expanded to offsets of single moves as in
+        positions(), positions of all paths are computed by one cumulative
+        sum and their fields are looked up together.
+        Return three arrays like results of walk(): whether each path avoids
+        walls, index of the reached field (the start for paths through a wall)
+        and number of moves walked.
+        """
+        count = len(paths)
+        runs = np.fromiter((len(path.codes) for path in paths), dtype=np.intp, count=count)
+        codes = np.fromiter(chain.from_iterable(path.codes for path in paths), dtype=np.uint8, count=runs.sum())
+        run_lengths = np.fromiter(chain.from_iterable(path.lengths for path in paths), dtype=np.intp,
+                                  count=len(codes))
+        lengths = np.zeros(count, dtype=np.intp)
+        np.add.at(lengths, np.repeat(np.arange(count), runs), run_lengths)
+        starts = np.zeros(count, dtype=np.intp)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        owners = np.repeat(np.arange(count), lengths)
+        steps = np.arange(len(owners)) - starts[owners]
+        positions = np.cumsum(np.repeat(np.asarray(self.offsets, dtype=np.intp)[codes], run_lengths))
+        before = np.concatenate(([0], positions))[starts]
+        positions += self.start - before[owners]
+        # past the first wall a path may leave the array, but it is invalid anyway
+        fields = self.fields.take(positions, mode='clip')
+
+        walked = lengths
+        if stop_at_exit:
+            walked = np.minimum(lengths, _first(fields == EXIT, owners, steps, lengths) + 1)
+        valid = _first(fields == WALL, owners, steps, lengths) >= walked
+        ends = np.full(count, self.start, dtype=np.intp)
+        moved = valid & (walked > 0)
+        ends[moved] = positions[starts[moved] + walked[moved] - 1]
+        return valid, ends, walked
+
+    def reaches(self):
+        """Return free steps and steps to an exit from every field in every direction.
+
+        Both are lists indexed by direction code of arrays indexed by field:
+        the number of moves possible before a wall, and the number of moves
+        to the first exit within them (0 if there is none). They are computed
+        on first use.
+        """
+        if 'reaches' not in self._cache:
+            grid = self.fields.reshape(self.rows + 2, self.width)
+            views = (lambda a: a.T[:, ::-1], lambda a: a[:, ::-1], lambda a: a.T, lambda a: a)
+            free = [None]*4
+            exits = [None]*4
+            for code, view in enumerate(views):
+                free_view = np.empty(grid.shape, dtype=np.int32)
+                exit_view = np.empty(grid.shape, dtype=np.int32)
+                view(free_view)[:], view(exit_view)[:] = _reach(view(grid))
+                free[code] = free_view.ravel()
+                exits[code] = exit_view.ravel()
+            self._cache['reaches'] = free, exits
+        return self._cache['reaches']
+
+    def walk_runs(self, path, stop_at_exit=False):
+        """Walk RunPath from the start with one check per run.
+
+        Fields reached after runs are cached in path.points until the first
+        run with an exit, and the walk continues after the cached runs.
+        Return the same as walk().
+        """
+        free, exits = self.reaches()
+        offsets = self.offsets
+        points = path.points
+        cached = len(points)
+        point = points[-1] if cached else self.start
+        walked = sum(path.lengths[:cached])
+        record = True
+        for code, length in zip(path.codes[cached:], path.lengths[cached:]):
+            steps = exits[code][point]
+            if 0 < steps <= length:
+                if stop_at_exit:
+                    return point + steps*offsets[code], walked + steps
+                record = False
+            if free[code][point] < length:
+                return None
+            point += length*offsets[code]
+            walked += length
+            if record:
+                points.append(point)
+        return point, walked
+
+    def _distance_field(self):
+        """Return array('i') of distances to the nearest exit, computed on first use.
+
+        Breadth-first search from all exits expands each layer at once by
+        NumPy on a view of the array, except layers of a few fields (like in
+        long corridors), which are expanded one field after another.
+        """
+        if 'distances' not in self._cache:
+            cells = self.cells
+            offsets = self.offsets
+            distances = array('i', [-1])*len(cells)
+            view = np.frombuffer(distances, dtype=np.intc)
+            free = self.fields != WALL
+            steps = np.asarray(offsets, dtype=np.intp)
+            claims = np.empty(len(cells), dtype=np.intp)
+            frontier = self.exits.tolist()
+            for point in frontier:
+                distances[point] = 0
+            distance = 0
+            while len(frontier):
+                distance += 1
+                if len(frontier) < SMALL_LAYER:
+                    layer = []
+                    for point in (frontier.tolist() if isinstance(frontier, np.ndarray) else frontier):
+                        for offset in offsets:
+                            neighbor = point + offset
+                            if distances[neighbor] < 0 and cells[neighbor] != WALL:
+                                distances[neighbor] = distance
+                                layer.append(neighbor)
+                    frontier = layer
+                else:
+                    neighbors = (np.asarray(frontier, dtype=np.intp)[:, None] + steps).ravel()
+                    neighbors = neighbors[free[neighbors] & (view[neighbors] < 0)]
+                    # a field reached from several fields is kept once, by the last claim
+                    order = np.arange(len(neighbors))
+                    claims[neighbors] = order
+                    frontier = neighbors[claims[neighbors] == order]
+                    view[frontier] = distance
+            self._cache['distances'] = distances
+        return self._cache['distances']
+
+    def distances(self):
+        """Return distances of fields to the nearest exit, -1 for unreachable ones.
+
+        Distances are found by one breadth-first search from all exits, so
+        the distance of the start is the length of the shortest path.
+        """
+        return np.frombuffer(self._distance_field(), dtype=np.intc)
+
+    def reachable(self, index=None):
+        """Return whether an exit can be reached from the field with index, the start by default."""
+        return self._distance_field()[self.start if index is None else index] >= 0
+
+    def descend(self, index, rng=None):
+        """Return codes of a shortest path from the field with index to the nearest exit.
+
+        - rng -- random generator to choose between equally short moves,
+            the first one is taken if not given
+        Raise UnreachableExit if no exit can be reached from the field.
+        """
+        distances = self._distance_field()
+        offsets = self.offsets
+        if distances[index] < 0:
+            raise UnreachableExit('Exit cannot be reached')
+        codes = bytearray()
+        while distances[index]:
+            closer = distances[index] - 1
+            moves = [code for code, offset in enumerate(offsets) if distances[index + offset] == closer]
+            code = moves[0] if rng is None else rng.choice(moves)
+            codes.append(code)
+            index += offsets[code]
+        return bytes(codes)
+
+    def guided_path(self, noise=0.2, rng=random):
+        """Return codes of a random path from the start descending the distance field.
+
+        Every move is random with probability noise and goes closer to the
+        nearest exit otherwise, so paths are diverse but close to the shortest.
+        """
+        distances = self._distance_field()
+        cells = self.cells
+        offsets = self.offsets
+        point = self.start
+        if distances[point] < 0:
+            raise UnreachableExit('Exit cannot be reached')
+        codes = bytearray()
+        while distances[point]:
+            if rng.random() < noise:
+                code = rng.randrange(4)
+                if cells[point + offsets[code]] == WALL:
+                    continue
+            else:
+                closer = distances[point] - 1
+                code = rng.choice([c for c, offset in enumerate(offsets)
+                                   if distances[point + offset] == closer])
+            codes.append(code)
+            point += offsets[code]
+        return bytes(codes)
+
+    def repair(self, codes):
+        """Return codes of the path cut before its first wall and led to the nearest exit.
+
+        The path is also cut at the first exit it reaches.
+        """
+        cells = self.cells
+        offsets = self.offsets
+        point = self.start
+        for k, code in enumerate(codes):
+            field = cells[point + offsets[code]]
+            if field == WALL:
+                return bytes(codes[:k]) + self.descend(point)
+            point += offsets[code]
+            if field == EXIT:
+                return bytes(codes[:k + 1])
+        return bytes(codes) + self.descend(point)
+
+
+def parse_grid(data, rows, cols):
+    """Parse grid of field digits at the start of bytes data in one pass.
+
+    Rows ending with '\\n' or '\\r\\n' of equal length are viewed as one
+    array, other rows are parsed one by one.
+    Return rows x cols uint8 array of field values and the rest of data.
+    Raise ValueError if a row does not have cols fields or a field is not
+    one of the digits 0, 1, 5 and 8.
+    """
+    if not data.endswith(b'\n'):
+        data += b'\n'
+    width = data.find(b'\n') + 1
+    if width in (cols + 1, cols + 2) and len(data) >= rows*width:
+        block = np.frombuffer(data, dtype=np.uint8, count=rows*width).reshape(rows, width)
+        if (block[:, -1] == ord('\n')).all() and (block[:, cols:-1] == ord('\r')).all():
+            return _fields(block[:, :cols]), data[rows*width:]
+    lines = data.split(b'\n', rows)
+    if len(lines) <= rows:
+        raise ValueError('Grid has fewer rows than expected')
+    fields = [line.rstrip() for line in lines[:rows]]
+    if any(len(line) != cols for line in fields):
+        raise ValueError('Grid has rows of wrong length')
+    return _fields(np.frombuffer(b''.join(fields), dtype=np.uint8).reshape(rows, cols)), lines[rows]
+
+
+def _fields(digits):
+    """Return array of field values of the array of digit bytes, checking them."""
+    grid = digits - ord('0')
+    if not np.isin(grid, (NORMAL, WALL, AGENT, EXIT)).all():
+        raise ValueError('Grid has invalid fields')
+    return grid
+
+
+def _reach(grid):
+    """Return free moves to the right and moves to the first exit within them for each field."""
+    columns = np.arange(grid.shape[1])
+    walls = np.where(grid == WALL, columns, grid.shape[1])
+    exits = np.where(grid == EXIT, columns, grid.shape[1])
+    next_wall = np.minimum.accumulate(walls[:, ::-1], axis=1)[:, ::-1]
+    next_exit = np.minimum.accumulate(exits[:, ::-1], axis=1)[:, ::-1]
+    next_wall = np.concatenate((next_wall[:, 1:], np.full((len(grid), 1), grid.shape[1])), axis=1)
+    next_exit = np.concatenate((next_exit[:, 1:], np.full((len(grid), 1), grid.shape[1])), axis=1)
+    free = np.maximum(next_wall - columns - 1, 0)
+    to_exit = np.where(next_exit < next_wall, next_exit - columns, 0)
+    return free, to_exit
+
+
+def _first(mask, owners, steps, default):
+    """Return step of the first True in mask for each path, default where there is none."""
+    first = np.array(default, dtype=np.intp)
+    owners, index = np.unique(owners[mask], return_index=True)
+    first[owners] = steps[mask][index]
+    return first
@@ -0,0 +1,130 @@
+"""Run-length encoded paths of the maze escape solvers.
+
+A path is stored as runs of equal moves: a list of direction codes (coded as
+in MazeGrid, opposite directions differ by 2) and a list of their lengths.
+Exchanging segments and removing walks in opposite directions work on runs,
+so they cost O(turns) instead of O(moves) on long corridors. A solver may
+cache the cost of the path on it; methods changing the moves reset it.
+Fields reached after the leading runs are cached too (by MazeGrid.walk_runs)
+and only those after the first changed run are dropped, so a neighbor
+sharing a prefix with its parent is walked from the first changed run.
+"""
+from itertools import groupby
+
+
+class RunPath:
+    """Path of moves stored as runs of equal direction codes."""
+
+    __slots__ = ('codes', 'lengths', 'cost', 'points')
+
+    def __init__(self, codes=None, lengths=None):
+        """Create path from lists of direction codes of runs and their lengths."""
+        self.codes = codes if codes is not None else []
+        self.lengths = lengths if lengths is not None else []
+        self.cost = None
+        self.points = []
+
+    @classmethod
+    def from_moves(cls, moves):
+        """Create path from bytes of direction codes of single moves."""
+        path = cls()
+        for code, run in groupby(moves):
+            path.codes.append(code)
+            path.lengths.append(sum(1 for _ in run))
+        return path
+
+    def moves(self):
+        """Return bytes of direction codes of single moves."""
+        return b''.join(bytes((code,))*length for code, length in zip(self.codes, self.lengths))
+
+    def copy(self):
+        """Return copy of the path with its cached cost."""
+        path = RunPath(self.codes.copy(), self.lengths.copy())
+        path.cost = self.cost
+        path.points = self.points.copy()
+        return path
+
+    def __len__(self):
+        return sum(self.lengths)
+
+    def __eq__(self, other):
+        return isinstance(other, RunPath) and self.codes == other.codes and self.lengths == other.lengths
+
+    def __hash__(self):
+        return hash((tuple(self.codes), tuple(self.lengths)))
+
+    def split(self, position):
+        """Make a run boundary after position moves and return index of the run starting there."""
+        for run, length in enumerate(self.lengths):
+            if position <= 0:
+                return run
+            if position < length:
+                del self.points[run:]
+                self.codes.insert(run + 1, self.codes[run])
+                self.lengths.insert(run + 1, length - position)
+                self.lengths[run] = position
+                return run + 1
+            position -= length
+        return len(self.lengths)
+
+    def truncate(self, position):
+        """Keep only the first position moves."""
+        run = self.split(position)
+        if run < len(self.codes):
+            del self.codes[run:]
+            del self.lengths[run:]
+            self.cost = None
+        del self.points[run:]
+        return self
+
+    def exchange(self, i, j, k):
+        """Exchange runs from i to j with runs from j to k and reduce the path."""
+        del self.points[i:]
+        self.codes[i:k] = self.codes[j:k] + self.codes[i:j]
+        self.lengths[i:k] = self.lengths[j:k] + self.lengths[i:j]
+        return self.reduce()
+
+    def exchange_moves(self, a, b, c, d):
+        """Replace moves from a to d by moves from c to d followed by moves from a to b.
+
+        Moves between b and c (b <= c) are dropped. The path is reduced.
+        """
+        for position in (a, b, c, d):
+            self.split(position)
+        i, j, k, m = (self.split(position) for position in (a, b, c, d))
+        del self.points[i:]
+        self.codes[i:m] = self.codes[k:m] + self.codes[i:j]
+        self.lengths[i:m] = self.lengths[k:m] + self.lengths[i:j]
+        return self.reduce()
+
+    def reduce(self):
+        """Merge runs of equal moves and remove walking in the opposite directions."""
+        codes = []
+        lengths = []
+        changed = len(self.codes)
+        for run, (code, length) in enumerate(zip(self.codes, self.lengths)):
+            while length and codes:
+                if codes[-1] == code:
+                    changed = min(changed, len(codes) - 1)
+                    lengths[-1] += length
+                    length = 0
+                elif codes[-1] == code ^ 2:
+                    changed = min(changed, len(codes) - 1)
+                    cancelled = min(lengths[-1], length)
+                    lengths[-1] -= cancelled
+                    length -= cancelled
+                    if not lengths[-1]:
+                        codes.pop()
+                        lengths.pop()
+                else:
+                    break
+            if length:
+                if len(codes) != run:
+                    changed = min(changed, len(codes))
+                codes.append(code)
+                lengths.append(length)
+        self.codes = codes
+        self.lengths = lengths
+        self.cost = None
+        del self.points[changed:]
+        return self
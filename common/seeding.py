@@ -0,0 +1,31 @@
+"""Seeding of random number generators.
+
+Solvers draw from the global generators of random and NumPy, so a run is
+reproducible when both are seeded before the solver starts.
+"""
+import os
+import random
+
+import numpy as np
+
+
+SEED_ENV = 'METAHEURISTIC_SEED'
+
+
+def seed_from_env():
+    """Seed random and NumPy generators with METAHEURISTIC_SEED and return the seed.
+
+    Nothing is seeded and None is returned when the variable is not set.
+    """
+    seed = os.environ.get(SEED_ENV)
+    if not seed:
+        return None
+    seed = int(seed)
+    seed_generators(seed)
+    return seed
+
+
+def seed_generators(seed):
+    """Seed random and NumPy generators with seed."""
+    random.seed(seed)
+    np.random.seed(seed)
@@ -0,0 +1,45 @@
+"""Tabu memory with constant time membership checks."""
+from collections import deque
+
+
+class TabuList:
+    """Tabu list of hashable attributes with bounded tenure.
+
+    Attributes (e.g. moved cities or hashes of solutions) are counted in a dict
+    for membership checks and queued in a ring buffer, which evicts the oldest
+    of them when tenure is exceeded.
+    """
+
+    def __init__(self, tenure):
+        """Create new empty tabu list.
+
+        - tenure -- max number of attributes kept in the list
+        """
+        self.tenure = tenure
+        self.queue = deque()
+        self.members = {}
+
+    def __contains__(self, attribute):
+        return attribute in self.members
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, attribute):
+        """Add attribute to the list and evict the oldest one if needed."""
+        self.queue.append(attribute)
+        self.members[attribute] = self.members.get(attribute, 0) + 1
+        if len(self.queue) > self.tenure:
+            self.pop()
+
+    def pop(self):
+        """Remove the oldest attribute from the list and return it."""
+        if not self.queue:
+            return None
+        attribute = self.queue.popleft()
+        count = self.members[attribute] - 1
+        if count:
+            self.members[attribute] = count
+        else:
+            del self.members[attribute]
+        return attribute
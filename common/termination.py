@@ -0,0 +1,110 @@
+"""Termination policy of solver loops.
+
+A solver loop stops when its time limit passes, when it used up its budget of
+objective evaluations or iterations, or when it has not improved for a number
+of iterations. Budgets make runs deterministic and comparable between
+machines, while the time limit remains the safety bound.
+"""
+import os
+import time
+
+
+MAX_EVALUATIONS_ENV = 'METAHEURISTIC_MAX_EVALUATIONS'
+MAX_ITERATIONS_ENV = 'METAHEURISTIC_MAX_ITERATIONS'
+STAGNATION_ENV = 'METAHEURISTIC_STAGNATION'
+
+CLOCK_RESOLUTION = 0.001
+
+
+class Termination:
+    """Stopping criterion checked once per iteration of a solver loop.
+
+    Evaluations, iterations and improvements are read from Stats of the
+    solver, so the loop only counts them as it already does. The clock is
+    read only every check_every calls of done(); without check_every the
+    interval is adapted so the clock is read about every CLOCK_RESOLUTION
+    seconds, however fast the iterations are.
+    """
+
+    def __init__(self, time_limit=None, max_evaluations=None, max_iterations=None,
+                 stagnation=None, check_every=None):
+        """Create new policy; limits that are None are not checked.
+
+        - time_limit -- seconds from start() to stop after
+        - max_evaluations -- number of objective evaluations to stop after
+        - max_iterations -- number of iterations to stop after
+        - stagnation -- number of iterations without improvement to stop after
+        - check_every -- number of calls of done() between reading the clock
+        """
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.max_iterations = max_iterations
+        self.stagnation = stagnation
+        self.check_every = check_every
+        self.stats = None
+
+    @classmethod
+    def from_env(cls, time_limit=None, **limits):
+        """Create policy with the time limit and limits overridden by environment variables.
+
+        METAHEURISTIC_MAX_EVALUATIONS, METAHEURISTIC_MAX_ITERATIONS and
+        METAHEURISTIC_STAGNATION set the corresponding limits.
+        """
+        for name, env in (('max_evaluations', MAX_EVALUATIONS_ENV),
+                          ('max_iterations', MAX_ITERATIONS_ENV),
+                          ('stagnation', STAGNATION_ENV)):
+            if os.environ.get(env):
+                limits[name] = int(os.environ[env])
+        return cls(time_limit, **limits)
+
+    def start(self, stats, elapsed=0.0):
+        """Start counting time and stagnation of the run counted in stats.
+
+        - stats -- Stats of the solver to read the counters from
+        - elapsed -- seconds already spent by the run, when it is resumed
+        Return the policy itself.
+        """
+        now = time.perf_counter()
+        self.stats = stats
+        self.deadline = None if self.time_limit is None else now + self.time_limit - elapsed
+        self.calls = 0
+        self.interval = self.check_every or 1
+        self.last_check = now
+        self.improvements = stats.improvements
+        self.improved_at = stats.iterations
+        return self
+
+    def done(self):
+        """Check whether the loop should stop."""
+        stats = self.stats
+        if self.max_evaluations is not None and stats.evaluations >= self.max_evaluations:
+            return True
+        if self.max_iterations is not None and stats.iterations >= self.max_iterations:
+            return True
+        if self.stagnation is not None:
+            if stats.improvements != self.improvements:
+                self.improvements = stats.improvements
+                self.improved_at = stats.iterations
+            elif stats.iterations - self.improved_at >= self.stagnation:
+                return True
+        if self.deadline is None:
+            return False
+
+        self.calls += 1
+        if self.calls < self.interval:
+            return False
+        self.calls = 0
+        now = time.perf_counter()
+        if self.check_every is None:
+            if now - self.last_check < CLOCK_RESOLUTION:
+                self.interval *= 2
+            elif self.interval > 1:
+                self.interval //= 2
+            self.last_check = now
+        return now >= self.deadline
+
+    def remaining(self):
+        """Return seconds left to the deadline, or None without time limit."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.perf_counter(), 0.0)
@@ -1,53 +1,142 @@
-import math
-import random
-from time import time
+import argparse
+import multiprocessing
+import os
+import sys
 
+import numpy as np
 
-def happycat(x1, x2, x3, x4):
-    args = [x1, x2, x3, x4]
-    x = sum(map(lambda u: u*u, args))
-    return 0.5 + ((x - 4)**2)**(1/8) + (x/2 + sum(args))/4
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.functions import happycat, griewank
+from common.instrumentation import Stats
+from common.seeding import seed_from_env
+from common.termination import Termination
 
 
-def griewank(x1, x2, x3, x4):
-    args = [x1, x2, x3, x4]
-    s = 0
-    prod = 1
-    for i, x in enumerate(args):
-        s += x**2/4000
-        prod *= math.cos(x/math.sqrt(i+1))
-    return 1 + s - prod
+def localsearch(f, t, r = 10, a = 100, b = -100, candidates = 100, dimension = 4, stats = None,
+                termination = None):
+    '''Search for minimum of f, which evaluates points in rows of an array
 
-
-def localsearch(f, t, r = 10, a = 100, b = -100, candidates = 100):
+    All candidates of a round are sampled and evaluated in one batch.
+    stats -- Stats to count evaluations and iterations in
+    termination -- Termination policy to use instead of time limit t'''
+    stats = stats or Stats('localsearch')
+    f = stats.count(f)
     #best = (0,0,0,0)
     #best = tuple([3.10299516e-12, 1.47052138e-08, 6.88552228e-09, 4.14543269e-13] )
-    best = [random.uniform(a,b), random.uniform(a,b), random.uniform(a,b), random.uniform(a,b)]
-    endtime = time() + t
+    best = np.random.uniform(a, b, dimension)
+    best_value = f(best)
+    termination = (termination or Termination(t)).start(stats)
+
+    while not termination.done():
+        batch = best * np.random.normal(1, 0.5, (candidates, dimension))
+        values = f(batch)
+        stats.iterations += 1
+        k = np.argmin(values)
+        if values[k] < best_value:
+            best, best_value = batch[k], values[k]
+            stats.accepted += 1
+            stats.improvements += 1
+
+
+    print(' '.join(map(str, best)), best_value)
+
+
+def population_localsearch(f, t, walkers = 100, a = 100, b = -100, dimension = 4, step = None,
+                           patience = 50, workers = None, seed = None, stats = None,
+                           termination = None):
+    '''Search for minimum of f with many independent local search walkers
 
-    while time() <= endtime:
-        candidate = tuple(map(lambda u: u*random.gauss(1, 0.5), best))
-        for i in range(candidates):
-            cur_candidate = tuple(map(lambda u: u*random.gauss(1, 0.5), best))
-            if f(*cur_candidate) < f(*candidate):
-                candidate = cur_candidate
-        if f(*candidate) < f(*best):
-            best = candidate
+    Walkers are rows of one array and are advanced together. Each of them has
+    its own step size, enlarged after success and reduced after failure (1/5
+    success rule), and is restarted from a random point after patience rounds
+    without improvement.
+    step -- initial step size, tenth of the search range by default
+    workers -- number of processes to split walkers between
+    stats -- Stats to count evaluations and iterations in
+    termination -- Termination policy of every group of walkers to use
+        instead of time limit t
+    Return the best point and its value.'''
+    stats = stats or Stats('population localsearch')
+    if workers is not None and workers > 1:
+        groups = [len(g) for g in np.array_split(np.arange(walkers), workers) if len(g)]
+        seeds = np.random.SeedSequence(seed).spawn(len(groups))
+        jobs = [(f, t, g, a, b, dimension, step, patience, s, termination)
+                for g, s in zip(groups, seeds)]
+        with multiprocessing.Pool(len(groups)) as pool:
+            results = pool.starmap(_walker_group, jobs)
+        for result in results:
+            stats.merge(result[2])
+        return min(results, key=lambda u: u[1])[:2]
 
+    f = stats.count(f)
+    rng = np.random.default_rng(seed)
+    low, high = min(a, b), max(a, b)
+    step = (high - low)/10 if step is None else step
+    points = rng.uniform(low, high, (walkers, dimension))
+    values = f(points)
+    steps = np.full(walkers, float(step))
+    stagnant = np.zeros(walkers, dtype=int)
+    k = np.argmin(values)
+    best, best_value = points[k].copy(), values[k]
+    termination = (termination or Termination(t)).start(stats)
 
-    print('{0} {1} {2} {3}'.format(*best), f(*best))
+    while not termination.done():
+        candidates = points + steps[:, None]*rng.standard_normal(points.shape)
+        candidate_values = f(candidates)
+        better = candidate_values < values
+        stats.iterations += 1
+        stats.accepted += int(better.sum())
+        points[better] = candidates[better]
+        values[better] = candidate_values[better]
+        steps = np.where(better, steps*2, steps*0.84)
+        stagnant = np.where(better, 0, stagnant + 1)
+        k = np.argmin(values)
+        if values[k] < best_value:
+            best, best_value = points[k].copy(), values[k]
+            stats.improvements += 1
+
+        restart = stagnant > patience
+        if restart.any():
+            points[restart] = rng.uniform(low, high, (restart.sum(), dimension))
+            values[restart] = f(points[restart])
+            steps[restart] = step
+            stagnant[restart] = 0
+
+    return best, best_value
+
+
+def _walker_group(f, t, walkers, a, b, dimension, step, patience, seed, termination):
+    '''Run group of walkers in pool worker and return the best point, its value and stats'''
+    stats = Stats('population localsearch')
+    best, best_value = population_localsearch(f, t, walkers, a, b, dimension, step, patience,
+                                              seed=seed, stats=stats, termination=termination)
+    return best, best_value, stats
 
 
 def main():
     '''Main function of the package'''
+    parser = argparse.ArgumentParser(description='Local search for minimum of HappyCat or Griewank function')
+    parser.add_argument('--walkers', type=int,
+                        help='run that many local search walkers together')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes to split walkers between')
+    args = parser.parse_args()
+    seed = seed_from_env()
+
     i = input().split()
     t = int(i[0])
     b = int(i[1])
+    f = happycat if b == 0 else griewank
+    stats = Stats('population localsearch' if args.walkers else 'localsearch')
+    termination = Termination.from_env(t)
 
-    if b == 0:
-        localsearch(happycat, t, r = 0.2)
+    if args.walkers:
+        best, best_value = population_localsearch(f, t, args.walkers, workers=args.workers,
+                                                  seed=seed, stats=stats, termination=termination)
+        print(' '.join(map(str, best)), best_value)
     else:
-        localsearch(griewank, t, r = 12)
+        localsearch(f, t, r = 0.2 if b == 0 else 12, stats = stats, termination = termination)
+    stats.report()
 
 
 if __name__ == '__main__':
@@ -1,7 +1,22 @@
+import argparse
+import functools
+import heapq
+import multiprocessing
+import os
+import pickle
 import random
 import sys
+from multiprocessing import shared_memory
 from time import time
 
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.instrumentation import Stats
+from common.seeding import seed_from_env
+from common.tabu import TabuList
+from common.termination import Termination
+
 def swap(route, i, j):
     '''Swap elements between i-th and j-th place'''
     if i >= len(route) or j >= len(route):
@@ -21,80 +36,708 @@ def inverse(route, i, j):
     mod_route = route[:i] + slice + route[j:]
     return mod_route
 
+def exchange(route, i, j, k):
+    '''Exchange subseries from i to j with subseries from j to k'''
+    if k >= len(route):
+        return None
+    return route[:i] + route[j:k] + route[i:j] + route[k:]
+
+def swap_delta(grid, route, i, j):
+    '''Calculate cost change of swapping i-th and j-th city (i < j)'''
+    a, b, c = route[i-1], route[i], route[i+1]
+    x, y, z = route[j-1], route[j], route[j+1]
+    if j == i + 1:
+        return grid[a][y] + grid[y][b] + grid[b][z] - grid[a][b] - grid[b][y] - grid[y][z]
+    return (grid[a][y] + grid[y][c] + grid[x][b] + grid[b][z]
+            - grid[a][b] - grid[b][c] - grid[x][y] - grid[y][z])
+
+def path_costs(grid, route):
+    '''Calculate prefix costs of the route walked forwards and backwards'''
+    forward = [0]
+    backward = [0]
+    for k in range(len(route)-1):
+        forward.append(forward[-1] + grid[route[k]][route[k+1]])
+        backward.append(backward[-1] + grid[route[k+1]][route[k]])
+    return forward, backward
+
+def inverse_delta(grid, route, i, j, forward, backward):
+    '''Calculate cost change of inversing a subseries from i to j
+
+    forward, backward -- prefix costs of the route from path_costs()'''
+    a, b = route[i-1], route[i]
+    y, z = route[j-1], route[j]
+    inner = backward[j-1] - backward[i] - forward[j-1] + forward[i]
+    return grid[a][y] + grid[b][z] - grid[a][b] - grid[y][z] + inner
+
+def exchange_delta(grid, route, i, j, k):
+    '''Calculate cost change of exchanging subseries from i to j and from j to k'''
+    a, b = route[i-1], route[i]
+    x, y = route[j-1], route[j]
+    u, v = route[k-1], route[k]
+    return grid[a][y] + grid[u][b] + grid[x][v] - grid[a][b] - grid[x][y] - grid[u][v]
+
+def relocation_triples(n, length=3):
+    '''Calculate places i < j < k of exchanges in a route of n cities relocating up to length cities
+
+    Subseries from i to j are moved forwards and those from j to k backwards
+    past a longer subseries, so every move is listed once. Moves are sorted
+    by i, j and k.'''
+    steps = np.arange(1, length + 1, dtype=np.int32)
+    counts = []
+    j, k = [np.empty(0, dtype=np.int32)], [np.empty(0, dtype=np.int32)]
+    for first in range(1, n):
+        count = 0
+        for middle in range(first + 1, min(first + length, n - 1) + 1):
+            k.append(np.arange(middle + 1, n + 1, dtype=np.int32))
+            j.append(np.full(n - middle, middle, dtype=np.int32))
+            count += n - middle
+        middle = np.arange(first + length + 1, n, dtype=np.int32)[:, None]
+        last = middle + steps
+        valid = last <= n
+        k.append(last[valid])
+        j.append(np.broadcast_to(middle, last.shape)[valid])
+        counts.append(count + len(k[-1]))
+    i = np.repeat(np.arange(1, n, dtype=np.int32), counts)
+    return i, np.concatenate(j), np.concatenate(k)
+
+MOVES = {
+    'swap': swap,
+    'inverse': inverse,
+    'oropt': exchange,
+    '3opt': exchange,
+}
+
+def move_attribute(route, i, j):
+    '''Tabu attribute of a move: pair of cities on i-th and j-th place'''
+    a, b = route[i], route[j]
+    return (a, b) if a < b else (b, a)
+
+class CoordinateGrid:
+    '''Grid of distances between cities computed on demand from their coordinates
+
+    Distances are Euclidean, rounded to the nearest integer. Indexing with
+    a pair of cities (or arrays of cities) computes distances between them,
+    indexing with a single city returns its row, kept in a small LRU cache.'''
+    def __init__(self, coords, cache_bytes=2**24):
+        '''Initialize with n x d array of coordinates of cities
+
+        cache_bytes -- memory of cached rows, at least one row is cached'''
+        self.coords = np.ascontiguousarray(coords, dtype=float)
+        rows = max(1, cache_bytes // (8*max(len(self.coords), 1)))
+        self.row = functools.lru_cache(maxsize=rows)(self._row)
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            a, b = key
+            diff = self.coords[a] - self.coords[b]
+            return np.rint(np.sqrt((diff*diff).sum(axis=-1))).astype(np.int64)
+        return self.row(key)
+
+    def _row(self, city):
+        '''Calculate distances from the city to all cities'''
+        diff = self.coords - self.coords[city]
+        row = np.rint(np.sqrt((diff*diff).sum(axis=-1))).astype(np.int64)
+        row.flags.writeable = False
+        return row
+
+    def nearest(self, k, tile=64):
+        '''Find k nearest cities of every city, ordered by distance
+
+        The plane of the first two coordinates is split into square tiles of
+        about tile cities, and cities of a tile are compared only with those
+        in the ring of tiles around it. The result is exact: cities whose k-th
+        nearest may lie outside of the ring are compared again with a wider one.'''
+        coords = self.coords
+        n = len(coords)
+        k = min(k, n-1)
+        nearest = np.empty((n, k), dtype=np.int64)
+        plane = np.zeros((n, 2))
+        plane[:, :min(2, coords.shape[1])] = coords[:, :2]
+        low = plane.min(axis=0)
+        span = plane.max(axis=0) - low
+        side = max(1, int(np.sqrt(n / tile)))
+        cell = np.where(span > 0, span, 1) / side
+        tiles = np.minimum(((plane - low) / cell).astype(np.int64), side - 1)
+        ids = tiles[:, 0]*side + tiles[:, 1]
+        order = np.argsort(ids, kind='stable')
+        bounds = np.searchsorted(ids[order], np.arange(side*side + 1))
+        for tx in range(side):
+            for ty in range(side):
+                cities = order[bounds[tx*side + ty]:bounds[tx*side + ty + 1]]
+                ring = 1
+                while len(cities):
+                    x0, x1 = max(0, tx - ring), min(side - 1, tx + ring)
+                    y0, y1 = max(0, ty - ring), min(side - 1, ty + ring)
+                    whole = x0 == 0 and y0 == 0 and x1 == side - 1 and y1 == side - 1
+                    candidates = np.concatenate([order[bounds[x*side + y0]:bounds[x*side + y1 + 1]]
+                                                 for x in range(x0, x1 + 1)])
+                    ring += 1
+                    if len(candidates) <= k and not whole:
+                        continue
+                    squared = np.zeros((len(cities), len(candidates)))
+                    for axis in range(coords.shape[1]):
+                        diff = coords[cities, axis, None] - coords[None, candidates, axis]
+                        squared += diff*diff
+                    squared[cities[:, None] == candidates[None, :]] = float('inf')
+                    idx = np.argpartition(squared, k-1, axis=1)[:, :k]
+                    radius = np.sqrt(np.take_along_axis(squared, idx, axis=1).max(axis=1))
+                    idx = candidates[idx]
+                    margin = np.full(len(cities), float('inf'))
+                    for axis, (first, last) in enumerate(((x0, x1), (y0, y1))):
+                        if first > 0:
+                            margin = np.minimum(margin, plane[cities, axis] - low[axis] - first*cell[axis])
+                        if last < side - 1:
+                            margin = np.minimum(margin, low[axis] + (last + 1)*cell[axis] - plane[cities, axis])
+                    outside = radius >= margin
+                    found, idx = cities[~outside], idx[~outside]
+                    rounded = self[found[:, None], idx]
+                    nearest[found] = np.take_along_axis(idx, np.lexsort((idx, rounded), axis=1), axis=1)
+                    cities = cities[outside]
+        return nearest
+
+def nearest_neighbors(grid, k):
+    '''Find k nearest cities of every city, ordered by distance'''
+    if isinstance(grid, CoordinateGrid):
+        return grid.nearest(k)
+    n = len(grid)
+    k = min(k, n-1)
+    nearest = np.empty((n, k), dtype=np.int64)
+    for city in range(n):
+        row = np.array(grid[city], dtype=float)
+        row[city] = float('inf')
+        idx = np.argpartition(row, k-1)[:k]
+        nearest[city] = idx[np.argsort(row[idx], kind='stable')]
+    return nearest
+
+def hilbert_index(x, y, order=16):
+    '''Calculate positions of integer points (x, y) on Hilbert curve
+
+    x, y -- arrays of coordinates from range [0, 2**order)'''
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    side = 1 << order
+    index = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx) ^ ry)
+        flip = rx & ~ry
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return index
+
+def save_checkpoint(path, state):
+    '''Save search state to the file, replacing it atomically'''
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump(state, file)
+    os.replace(path + '.tmp', path)
+
+def load_checkpoint(path):
+    '''Load search state saved by save_checkpoint()'''
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+def close_route(tour):
+    '''Rotate tour of all cities to start in 0 and return to it'''
+    start = tour.index(0)
+    return tour[start:] + tour[:start] + [0]
+
 class TSP:
     '''Travelling Salesman Problem solver with Tabu Search'''
-    def __init__(self, grid):
-        '''Initialize with grid of distances between cities'''
-        self.grid = grid
+    def __init__(self, grid, vectorized=False, neighbors=None, depth=10, construction='nearest'):
+        '''Initialize with grid of distances between cities
+
+        vectorized -- keep the grid in a NumPy array and score whole
+            neighborhoods in batch
+        neighbors -- size of candidate lists; if given, only moves creating
+            edges to that many nearest cities are considered
+        depth -- max length of both exchanged subseries in 3-opt moves
+        construction -- default method of createfirst()'''
+        self.stats = Stats('tsp tabu search')
+        self.vectorized = vectorized
+        self.depth = depth
+        self.construction = construction
+        self.nearest = None if neighbors is None else nearest_neighbors(grid, neighbors)
+        self._candidates = self.nearest
+        self._relocations = None
+        if vectorized:
+            self.grid = grid if isinstance(grid, CoordinateGrid) else np.ascontiguousarray(grid)
+            n = len(self.grid)
+        if vectorized and neighbors is None:
+            i, j = np.triu_indices(n, 1)
+            self.swap_pairs = (i[i >= 1].astype(np.int32), j[i >= 1].astype(np.int32))
+            i, j = np.triu_indices(n, 3)
+            self.inverse_pairs = (i[i >= 1].astype(np.int32), j[i >= 1].astype(np.int32))
+        elif not vectorized:
+            self.grid = grid
 
     def cost(self, route):
         '''Calculate cost of the route'''
         if route is None:
             return float('inf')
 
+        if self.vectorized:
+            route = np.asarray(route)
+            return self.grid[route[:-1], route[1:]].sum().item()
+
         cost = 0
         for i in range(len(route)-1):
             cost += self.grid[route[i]][route[i+1]]
         return cost
 
 
-    def createfirst(self):
-        '''Create first instance of the route. Use greedy method.'''
+    def distances(self, a, b):
+        '''Calculate distances between arrays of cities a and b'''
+        if self.vectorized:
+            return np.asarray(self.grid[a, b])
+        grid = self.grid
+        return np.array([grid[x][y] for x, y in zip(*np.broadcast_arrays(a, b))])
+
+    def createfirst(self, method=None):
+        '''Create first instance of the route
+
+        method -- construction heuristic: 'nearest' (nearest neighbor),
+            'greedy' (greedy edge) or 'spacefilling' (Hilbert curve order,
+            only for CoordinateGrid); the TSP default if not given'''
+        method = method or self.construction
+        if method == 'nearest':
+            return self.nearest_route()
+        if method == 'greedy':
+            return self.greedy_route()
+        if method == 'spacefilling':
+            return self.spacefilling_route()
+        raise ValueError(f'Unknown construction method: {method}')
+
+    def nearest_route(self):
+        '''Create route by going to the nearest unvisited city'''
+        if not self.vectorized:
+            return self.nearest_route_list()
+        if isinstance(self.grid, CoordinateGrid):
+            return self.nearest_route_coords()
+        unvisited = np.arange(1, len(self.grid))
+        result = [0]
+        while len(unvisited):
+            k = int(np.argmin(self.grid[result[-1], unvisited]))
+            result.append(int(unvisited[k]))
+            unvisited = np.delete(unvisited, k)
+        result.append(0)
+        return result
+
+    def nearest_route_coords(self):
+        '''Create route by going to the nearest unvisited city by coordinates'''
+        coords = self.grid.coords
+        unvisited = np.arange(1, len(coords))
+        points = coords[1:].T.copy()
+        result = [0]
+        for m in range(len(unvisited), 0, -1):
+            city = coords[result[-1]]
+            distances = np.zeros(m)
+            for axis, position in zip(points, city):
+                distances += (axis[:m] - position)**2
+            k = int(np.argmin(distances))
+            result.append(int(unvisited[k]))
+            unvisited[k] = unvisited[m-1]
+            points[:, k] = points[:, m-1]
+        result.append(0)
+        return result
+
+    def nearest_route_list(self):
+        '''Create route by going to the nearest unvisited city on list grid'''
+        n = len(self.grid)
+        visited = np.zeros(n, dtype=bool)
+        visited[0] = True
         result = [0]
-        tmp_grid = self.grid
-        for i in range(len(tmp_grid)-1):
-            city = result[i]
-            distances = tmp_grid[city]
-            min = float('inf')
-            min_idx = None
-            for j in range(1, len(distances)):
-                if j not in result and distances[j] < min:
-                    min = distances[j]
-                    min_idx = j
-            next_city = min_idx
-            result.append(next_city)
+        for _ in range(n-1):
+            distances = np.array(self.grid[result[-1]], dtype=float)
+            distances[visited] = float('inf')
+            city = int(np.argmin(distances))
+            visited[city] = True
+            result.append(city)
         result.append(0)
         return result
 
+    def greedy_route(self):
+        '''Create route by adding the shortest edges between candidates
 
-    def tabusearch(self, t, tabu_limit):
-        '''Run Tabu Search for TSP instance'''
-        endtime = time() + t
+        Edges are added if they do not close a cycle or make a city of
+        degree 3. Fragments are joined by their nearest ends afterwards.
+        Candidates are the neighbor lists, or 10 nearest cities of every
+        city computed on the first call if there are none.'''
         n = len(self.grid)
-        best = self.createfirst()
-        tabu_list = [best]
-        unchanged = 0
-        very_best = best
+        if n < 3:
+            return list(range(n)) + [0]
+        if self._candidates is None:
+            self._candidates = nearest_neighbors(self.grid, 10)
+        nearest = self._candidates
+        a = np.repeat(np.arange(n), nearest.shape[1])
+        b = nearest.ravel()
+        order = np.argsort(self.distances(a, b), kind='stable')
+        parent = list(range(n))
+        adjacent = [[] for _ in range(n)]
+
+        def find(city):
+            while parent[city] != city:
+                parent[city] = parent[parent[city]]
+                city = parent[city]
+            return city
+
+        for x, y in zip(a[order].tolist(), b[order].tolist()):
+            if len(adjacent[x]) < 2 and len(adjacent[y]) < 2:
+                root_x, root_y = find(x), find(y)
+                if root_x != root_y:
+                    parent[root_x] = root_y
+                    adjacent[x].append(y)
+                    adjacent[y].append(x)
+
+        ends = np.array([city for city in range(n) if len(adjacent[city]) < 2])
+        visited = np.zeros(n, dtype=bool)
+        tour = []
+        city = int(ends[0])
+        while True:
+            previous = None
+            while True:
+                tour.append(city)
+                visited[city] = True
+                following = [u for u in adjacent[city] if u != previous and not visited[u]]
+                if not following:
+                    break
+                previous, city = city, following[0]
+            free = ends[~visited[ends]]
+            if not len(free):
+                break
+            city = int(free[np.argmin(self.distances(city, free))])
+        return close_route(tour)
+
+    def spacefilling_route(self):
+        '''Create route visiting cities in order of Hilbert curve'''
+        if not isinstance(self.grid, CoordinateGrid):
+            raise ValueError('Space-filling curve construction needs coordinates of cities')
+        coords = self.grid.coords[:, :2]
+        low = coords.min(axis=0)
+        scale = (coords.max(axis=0) - low).max() or 1
+        points = ((coords - low) / scale * ((1 << 16) - 1)).astype(np.int64)
+        tour = np.argsort(hilbert_index(points[:, 0], points[:, 1]), kind='stable')
+        return close_route(tour.tolist())
 
-        while time() <= endtime:
+
+    def tabusearch(self, t, tabu_limit, moves=('swap', 'inverse'), start=None, **options):
+        '''Run Tabu Search for TSP instance and return the best route
+
+        Arguments are the same as of tabusearch_iter().'''
+        for cost, very_best, elapsed in self.tabusearch_iter(t, tabu_limit, moves, start, **options):
+            pass
+        return very_best
+
+    def tabusearch_iter(self, t, tabu_limit, moves=('swap', 'inverse'), start=None,
+                        checkpoint=None, checkpoint_interval=60, resume=False, termination=None):
+        '''Run Tabu Search for TSP instance yielding improvements of the best route
+
+        Yield tuples of cost, route and time elapsed since the start: first
+        for the first route, then whenever the best route is improved.
+        t -- max time to run
+        tabu_limit -- tenure of moved city pairs in tabu list
+        moves -- kinds of moves from MOVES; the first one is used after
+            improvement, each next one after another unchanged iteration
+        start -- first route; greedy one is created if not given
+        checkpoint -- file to save search state (routes, tabu list, random
+            generator state) to every checkpoint_interval seconds and at the end
+        resume -- continue from the state saved in checkpoint file, if it
+            exists, for the rest of time t
+        termination -- Termination policy to use instead of time limit t'''
+        n = len(self.grid)
+        if resume and checkpoint and os.path.exists(checkpoint):
+            state = load_checkpoint(checkpoint)
+            best, best_cost = state['best'], state['best_cost']
+            very_best, very_best_cost = state['very_best'], state['very_best_cost']
+            tabu_list, unchanged = state['tabu_list'], state['unchanged']
+            random.setstate(state['random'])
+            elapsed = state['elapsed']
+        else:
+            with self.stats.phase('construction'):
+                best = self.createfirst() if start is None else start
+            best_cost = self.cost(best)
+            tabu_list = TabuList(tabu_limit)
+            unchanged = 0
+            very_best = best
+            very_best_cost = best_cost
+            elapsed = 0
+        termination = (termination or Termination(t)).start(self.stats, elapsed)
+        starttime = time() - elapsed
+        savetime = time() + checkpoint_interval
+
+        def save():
+            save_checkpoint(checkpoint, {
+                'best': best, 'best_cost': best_cost,
+                'very_best': very_best, 'very_best_cost': very_best_cost,
+                'tabu_list': tabu_list, 'unchanged': unchanged,
+                'random': random.getstate(), 'elapsed': time() - starttime,
+            })
+
+        yield very_best_cost, very_best, elapsed
+        while not termination.done():
             if unchanged > 100:
                 unchanged = 0
                 best = [0] + random.sample(range(1,n), n-1) + [0]
-                neighborhood = self.getneighbors(best)
-            elif unchanged > 0:
-                neighborhood = self.getneighbors_inv(best)
-            else:
-                neighborhood = self.getneighbors(best)
+                best_cost = self.cost(best)
+            kind = moves[min(unchanged, len(moves)-1)]
             best_candidate = None
-            for candidate in neighborhood:
-                if candidate not in tabu_list and self.cost(candidate) < self.cost(best_candidate):
-                    best_candidate = candidate.copy()
+            for delta, *places in self.bestmoves(best, kind):
+                attribute = move_attribute(best, *places[:2])
+                if attribute not in tabu_list or best_cost + delta < very_best_cost:
+                    best_candidate = MOVES[kind](best, *places)
+                    candidate_cost = best_cost + delta
+                    break
             if best_candidate is None:
-                tabu_list.pop(0)
+                tabu_list.pop()
             else:
-                tabu_list.append(best_candidate)
+                tabu_list.add(attribute)
 
-            if self.cost(best_candidate) < self.cost(best):
-                best = best_candidate.copy()
+            self.stats.iterations += 1
+            if best_candidate is not None and candidate_cost < best_cost:
+                best = best_candidate
+                best_cost = candidate_cost
                 unchanged = 0
+                self.stats.accepted += 1
             else:
                 unchanged += 1
-            if self.cost(best) < self.cost(very_best):
+            if best_cost < very_best_cost:
                 very_best = best
+                very_best_cost = best_cost
+                self.stats.improvements += 1
+                yield very_best_cost, very_best, time() - starttime
+            if checkpoint and time() >= savetime:
+                save()
+                savetime = time() + checkpoint_interval
+
+        if checkpoint:
+            save()
+
+
+    def bestmoves(self, route, kind='swap'):
+        '''Iterate over moves of the route starting from the best one
+
+        kind -- kind of moves from MOVES
+        Yield tuples of cost change and places of the move. Vectorized moves
+        are sorted in chunks of the smallest cost changes, since usually only
+        the first few are used.'''
+        if self.vectorized:
+            deltas, *places = self.getdeltas(route, kind)
+            self.stats.evaluations += len(deltas)
+            remaining = np.arange(len(deltas))
+            chunk = 1024
+            while len(remaining):
+                left = deltas[remaining]
+                if chunk < len(remaining):
+                    taken = left <= np.partition(left, chunk - 1)[chunk - 1]
+                    moves, remaining = remaining[taken], remaining[~taken]
+                    chunk *= 4
+                else:
+                    moves, remaining = remaining, remaining[:0]
+                for m in moves[np.argsort(deltas[moves], kind='stable')]:
+                    yield (deltas[m].item(), *(int(p[m]) for p in places))
+            return
+
+        getmoves = {
+            'swap': self.getmoves,
+            'inverse': self.getmoves_inv,
+            'oropt': self.getmoves_oropt,
+            '3opt': self.getmoves_3opt,
+        }
+        moves = getmoves[kind](route)
+        self.stats.evaluations += len(moves)
+        heapq.heapify(moves)
+        while moves:
+            yield heapq.heappop(moves)
+
+    def getdeltas(self, route, kind='swap'):
+        '''Calculate cost changes of all moves of the given kind in batch
+
+        Return arrays of deltas and places of the moves.'''
+        if kind == 'oropt':
+            return self.exchange_deltas(route, *self.oropt_triples(route))
+        if kind == '3opt':
+            return self.exchange_deltas(route, *self.exchange_triples(route, self.depth, self.depth))
+        inversions = kind == 'inverse'
+        if self.nearest is not None:
+            pairs = self.candidate_pairs(route, inversions)
+        else:
+            pairs = self.inverse_pairs if inversions else self.swap_pairs
+        if inversions:
+            return self.inverse_deltas(route, *pairs)
+        return self.swap_deltas(route, *pairs)
+
+    def candidate_edges(self, route):
+        '''Find places of cities and of their nearest neighbors in the route
+
+        Return arrays of places p and s such that route[s] is a candidate of route[p].'''
+        n = len(route) - 1
+        route = np.asarray(route)
+        places = np.empty(n, dtype=np.int64)
+        places[route[:-1]] = np.arange(n)
+        near = self.nearest[route]
+        k = near.shape[1]
+        place = np.repeat(np.arange(n+1), k)
+        near_place = places[near].ravel()
+        place = np.concatenate((place, place))
+        near_place = np.concatenate((near_place, np.where(near.ravel() == 0, n, near_place)))
+        return place, near_place
+
+    def candidate_pairs(self, route, inversions=False):
+        '''Calculate moves creating edges to the nearest neighbors of cities
+
+        inversions -- calculate inversion moves instead of swaps
+        Return arrays of places i < j of the moves.'''
+        n = len(route) - 1
+        place, near_place = self.candidate_edges(route)
+        if inversions:
+            low = np.minimum(place, near_place)
+            high = np.maximum(place, near_place)
+            i = np.concatenate((low + 1, low))
+            j = np.concatenate((high + 1, high))
+            valid = (i >= 1) & (j <= n-1) & (j >= i+3)
+        else:
+            next_place = np.concatenate((place - 1, place + 1))
+            near_place = np.concatenate((near_place, near_place))
+            i = np.minimum(next_place, near_place)
+            j = np.maximum(next_place, near_place)
+            valid = (i >= 1) & (j <= n-1) & (i < j)
+        keys = np.unique(i[valid]*(n+1) + j[valid])
+        return (keys // (n+1)).astype(np.int32), (keys % (n+1)).astype(np.int32)
+
+    def exchange_triples(self, route, first, second):
+        '''Calculate exchanges of subseries with bounded lengths
+
+        first, second -- max lengths of subseries from i to j and from j to k
+        With candidate lists, exchanges have to join the city before i with
+        a candidate on j (or city before k with a candidate on i, if first is
+        the shorter bound).
+        Return arrays of places i < j < k of the moves.'''
+        n = len(route) - 1
+        if self.nearest is None:
+            i = np.arange(1, n)[:, None, None]
+            j = i + np.arange(1, min(first, n) + 1)[None, :, None]
+            k = j + np.arange(1, min(second, n) + 1)[None, None, :]
+            i, j, k = np.broadcast_arrays(i, j, k)
+        else:
+            place, near_place = self.candidate_edges(route)
+            if second <= first:
+                i = place[:, None] + 1
+                j = near_place[:, None]
+                k = j + np.arange(1, second + 1)[None, :]
+            else:
+                k = place[:, None] + 1
+                i = near_place[:, None]
+                j = i + np.arange(1, first + 1)[None, :]
+            i, j, k = np.broadcast_arrays(i, j, k)
+        i, j, k = i.ravel(), j.ravel(), k.ravel()
+        valid = (i >= 1) & (i < j) & (j < k) & (k <= n) & (j - i <= first) & (k - j <= second)
+        return i[valid].astype(np.int32), j[valid].astype(np.int32), k[valid].astype(np.int32)
 
-        print(self.cost(very_best))
-        print(' '.join(list(map(lambda u: str(u+1), very_best))), file=sys.stderr)
+    def oropt_triples(self, route):
+        '''Calculate exchanges relocating subseries of up to 3 cities
 
+        Without candidate lists the moves do not depend on the route and are
+        calculated on the first call only.
+        Return arrays of places i < j < k of the moves.'''
+        n = len(route) - 1
+        if self.nearest is None:
+            if self._relocations is None:
+                self._relocations = relocation_triples(n)
+            return self._relocations
+        forward = self.exchange_triples(route, 3, n)
+        backward = self.exchange_triples(route, n, 3)
+        i, j, k = (np.concatenate(places) for places in zip(forward, backward))
+        keys = np.unique((i.astype(np.int64)*(n+1) + j)*(n+1) + k)
+        return ((keys // (n+1) // (n+1)).astype(np.int32),
+                (keys // (n+1) % (n+1)).astype(np.int32),
+                (keys % (n+1)).astype(np.int32))
+
+    def swap_deltas(self, route, i, j):
+        '''Calculate cost changes of swapping cities on places i and j
+
+        i, j -- arrays of places, i < j
+        Return arrays of deltas, i and j.'''
+        grid = self.grid
+        route = np.asarray(route)
+        a, b, c = route[i-1], route[i], route[i+1]
+        x, y, z = route[j-1], route[j], route[j+1]
+        deltas = (grid[a, y] + grid[y, c] + grid[x, b] + grid[b, z]
+                  - grid[a, b] - grid[b, c] - grid[x, y] - grid[y, z])
+        adjacent = np.flatnonzero(j == i + 1)
+        a, b, y, z = a[adjacent], b[adjacent], y[adjacent], z[adjacent]
+        deltas[adjacent] = grid[a, y] + grid[y, b] + grid[b, z] - grid[a, b] - grid[b, y] - grid[y, z]
+        return deltas, i, j
+
+    def inverse_deltas(self, route, i, j):
+        '''Calculate cost changes of inversing subseries from i to j
+
+        i, j -- arrays of subseries bounds, i < j
+        Return arrays of deltas, i and j.'''
+        grid = self.grid
+        route = np.asarray(route)
+        forward = np.concatenate(([0], np.cumsum(grid[route[:-1], route[1:]])))
+        backward = np.concatenate(([0], np.cumsum(grid[route[1:], route[:-1]])))
+        a, b = route[i-1], route[i]
+        y, z = route[j-1], route[j]
+        inner = backward[j-1] - backward[i] - forward[j-1] + forward[i]
+        deltas = grid[a, y] + grid[b, z] - grid[a, b] - grid[y, z] + inner
+        return deltas, i, j
+
+    def exchange_deltas(self, route, i, j, k):
+        '''Calculate cost changes of exchanging subseries from i to j and from j to k
+
+        i, j, k -- arrays of places, i < j < k
+        Return arrays of deltas, i, j and k.'''
+        grid = self.grid
+        route = np.asarray(route)
+        a, b = route[i-1], route[i]
+        x, y = route[j-1], route[j]
+        u, v = route[k-1], route[k]
+        deltas = grid[a, y] + grid[u, b] + grid[x, v] - grid[a, b] - grid[x, y] - grid[u, v]
+        return deltas, i, j, k
+
+    def getmoves(self, route):
+        '''Calculate cost changes of all swap moves of the route'''
+        grid = self.grid
+        if self.nearest is not None:
+            pairs = zip(*map(np.ndarray.tolist, self.candidate_pairs(route)))
+            return [(swap_delta(grid, route, i, j), i, j) for i, j in pairs]
+        moves = []
+        for i in range(1, len(route)-2):
+            for j in range(i+1, len(route)-1):
+                moves.append((swap_delta(grid, route, i, j), i, j))
+        return moves
+
+    def getmoves_inv(self, route):
+        '''Calculate cost changes of all inversion moves of the route'''
+        grid = self.grid
+        forward, backward = path_costs(grid, route)
+        if self.nearest is not None:
+            pairs = zip(*map(np.ndarray.tolist, self.candidate_pairs(route, True)))
+            return [(inverse_delta(grid, route, i, j, forward, backward), i, j) for i, j in pairs]
+        moves = []
+        for i in range(1, len(route)-3):
+            for j in range(i+3, len(route)-1):
+                moves.append((inverse_delta(grid, route, i, j, forward, backward), i, j))
+        return moves
+
+    def getmoves_oropt(self, route):
+        '''Calculate cost changes of all Or-opt moves of the route'''
+        grid = self.grid
+        triples = zip(*map(np.ndarray.tolist, self.oropt_triples(route)))
+        return [(exchange_delta(grid, route, i, j, k), i, j, k) for i, j, k in triples]
+
+    def getmoves_3opt(self, route):
+        '''Calculate cost changes of all 3-opt moves of the route'''
+        grid = self.grid
+        triples = zip(*map(np.ndarray.tolist, self.exchange_triples(route, self.depth, self.depth)))
+        return [(exchange_delta(grid, route, i, j, k), i, j, k) for i, j, k in triples]
 
     def getneighbors(self, route):
         '''Calculate neighbors of the route'''
@@ -112,18 +755,132 @@ class TSP:
                 neighborhood.append(inverse(route, i, j))
         return neighborhood
 
+def load_grid(file, n, m=None, dtype=np.int32, rows=1024):
+    '''Parse n x m grid (n x n by default) from text file into typed array
+
+    Rows are parsed in bulk, in blocks of the given number of rows.'''
+    m = n if m is None else m
+    grid = np.empty((n, m), dtype=dtype)
+    for start in range(0, n, rows):
+        stop = min(start + rows, n)
+        block = ''.join(file.readline() for _ in range(stop - start))
+        grid[start:stop] = np.fromstring(block, dtype=dtype, sep=' ').reshape(stop - start, m)
+    return grid
+
+_worker = None
+
+def _init_worker(name, shape, dtype, coordinates, options):
+    '''Attach pool worker to the shared grid and create its solver'''
+    global _worker
+    memory = shared_memory.SharedMemory(name=name)
+    grid = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    if coordinates:
+        grid = CoordinateGrid(grid)
+    _worker = (memory, TSP(grid, **options))
+
+def _run_worker(w, seed, endtime, tabu_limit, moves, termination):
+    '''Run w-th Tabu Search in pool worker until endtime or its termination'''
+    memory, tsp = _worker
+    random.seed(seed)
+    n = len(tsp.grid)
+    start = None if w == 0 else [0] + random.sample(range(1, n), n-1) + [0]
+    if termination.time_limit is not None:
+        termination.time_limit = endtime - time()
+    route = tsp.tabusearch(None, tabu_limit, moves, start, termination=termination)
+    return tsp.cost(route), route, tsp.stats
+
+def parallel_tabusearch(grid, t, tabu_limit, workers=None, moves=('swap', 'inverse'), seed=0,
+                        stats=None, termination=None, **options):
+    '''Run independent Tabu Searches in a process pool and return the best route
+
+    The grid (or coordinates of CoordinateGrid) is shared between processes.
+    The first search starts from the constructed route, the others from
+    random ones; the w-th search is seeded with seed + w.
+    workers -- number of processes, all CPU cores by default
+    stats -- Stats to merge counters of all searches into
+    termination -- Termination policy of every search to use instead of time limit t
+    options -- TSP options of every search'''
+    termination = termination or Termination(t)
+    endtime = time() + (termination.time_limit or 0)
+    workers = workers or os.cpu_count()
+    coordinates = isinstance(grid, CoordinateGrid)
+    grid = grid.coords if coordinates else np.ascontiguousarray(grid)
+    memory = shared_memory.SharedMemory(create=True, size=max(grid.nbytes, 1))
+    try:
+        np.ndarray(grid.shape, dtype=grid.dtype, buffer=memory.buf)[:] = grid
+        init_args = (memory.name, grid.shape, grid.dtype, coordinates, options)
+        with multiprocessing.Pool(workers, _init_worker, init_args) as pool:
+            jobs = [(w, seed + w, endtime, tabu_limit, moves, termination) for w in range(workers)]
+            results = pool.starmap(_run_worker, jobs)
+    finally:
+        memory.close()
+        memory.unlink()
+    if stats is not None:
+        for result in results:
+            stats.merge(result[2])
+    return min(results, key=lambda u: u[0])[1]
+
 def main():
     '''Main function of the package'''
+    parser = argparse.ArgumentParser(description='Travelling Salesman Problem solver with Tabu Search')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of parallel searches (0 for all CPU cores)')
+    parser.add_argument('--grid', help='binary .npy file with the grid to memory-map; '
+                                       'the input has only the first line then')
+    parser.add_argument('--save', help='save the grid from the input to binary .npy file')
+    parser.add_argument('--coords', action='store_true',
+                        help='rows of the grid are coordinates of cities instead of distances')
+    parser.add_argument('--neighbors', type=int,
+                        help='size of candidate lists of the nearest cities')
+    parser.add_argument('--construction', default='nearest',
+                        choices=('nearest', 'greedy', 'spacefilling'),
+                        help='construction heuristic of the first route')
+    parser.add_argument('--moves', nargs='+', default=['swap', 'inverse'], choices=list(MOVES),
+                        help='kinds of moves; the first one is used after improvement, '
+                             'each next one after another unchanged iteration')
+    parser.add_argument('--checkpoint', help='file to save search state to periodically')
+    parser.add_argument('--checkpoint-interval', type=float, default=60,
+                        help='seconds between checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue from the state saved in the checkpoint file')
+    parser.add_argument('--progress', action='store_true',
+                        help='print time and cost of every improvement to stderr')
+    args = parser.parse_args()
+    if args.workers != 1 and (args.checkpoint or args.progress):
+        parser.error('--checkpoint and --progress work with single search only')
+    seed = seed_from_env()
+
     i = input().split()
     t = int(i[0])
     n = int(i[1])
 
-    grid = []
-    for i in range(n):
-        grid.append(list(map(int, input().split())))
+    if args.grid:
+        grid = np.load(args.grid, mmap_mode='r')
+    elif args.coords:
+        grid = load_grid(sys.stdin, n, 2, dtype=float)
+    else:
+        grid = load_grid(sys.stdin, n)
+    if args.save:
+        np.save(args.save, grid)
+    if args.coords:
+        grid = CoordinateGrid(grid)
 
-    tsp = TSP(grid)
-    tsp.tabusearch(t, n)
+    options = {'vectorized': True, 'neighbors': args.neighbors, 'construction': args.construction}
+    tsp = TSP(grid, **options)
+    termination = Termination.from_env(t)
+    if args.workers == 1:
+        improvements = tsp.tabusearch_iter(t, n, args.moves, checkpoint=args.checkpoint,
+                                           checkpoint_interval=args.checkpoint_interval,
+                                           resume=args.resume, termination=termination)
+        for cost, best, elapsed in improvements:
+            if args.progress:
+                print(f'{elapsed:.3f} {cost}', file=sys.stderr, flush=True)
+    else:
+        best = parallel_tabusearch(grid, t, n, args.workers or None, args.moves, seed=seed or 0,
+                                   stats=tsp.stats, termination=termination, **options)
+    print(tsp.cost(best))
+    print(' '.join(list(map(lambda u: str(u+1), best))), file=sys.stderr)
+    tsp.stats.report()
 
 
 if __name__ == '__main__':
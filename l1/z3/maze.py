@@ -1,8 +1,15 @@
-from time import time
+import os
 import random
 import sys
 from enums import *
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.instrumentation import Stats
+from common.mazegrid import MazeGrid, EXIT, WALL
+from common.runpath import RunPath
+from common.tabu import TabuList
+from common.termination import Termination
+
 
 class WallException(Exception):
    def __init__(self):
@@ -34,51 +41,70 @@ class Maze:
     '''Maze escape solver with Tabu Search'''
 
     def __init__(self, grid, start, exit):
-        '''Initialize maze with the grid and positions of start and exit'''
-        self.grid = grid
+        '''Initialize maze with the grid and positions of start and exit
+
+        grid -- rows of Fields or MazeGrid'''
+        self.grid = grid if isinstance(grid, MazeGrid) else MazeGrid(grid, start, exit)
         self.start = start
         self.exit = exit
+        self.stats = Stats('maze tabu search')
+        self.repair_walls = False
 
 
     def getpoint(self, i, j):
         '''Get field type on the (i,j)'''
-        return self.grid[i][j]
+        return Field(self.grid.field(i, j))
 
 
     def cost(self, path):
-        '''Calculate cost of the path'''
-        if path is None or self.getpoint(*self.walk(path)) != Field.EXIT:
+        '''Calculate cost of the path
+
+        Cost of a RunPath is cached on it, so every path is walked at most once.'''
+        if path is None:
             return float('inf')
-        return len(path)
+        if isinstance(path, RunPath) and path.cost is not None:
+            return path.cost
+        cost = float('inf') if self.getpoint(*self.walk(path)) != Field.EXIT else len(path)
+        if isinstance(path, RunPath):
+            path.cost = cost
+        return cost
 
 
     def walk(self, path):
-        '''Walk the path from the start point'''
-        point = self.start
-        for move in path:
-            point = move.move(point)
-            if self.getpoint(*point) == Field.WALL:
-                raise WallException
-        return point
+        '''Walk the path (list of Directions or RunPath) from the start point'''
+        self.stats.evaluations += 1
+        if isinstance(path, RunPath):
+            end = self.grid.walk_runs(path)
+        else:
+            end = self.grid.walk(b''.join(path))
+        if end is None:
+            raise WallException
+        return self.grid.position(end[0])
 
 
     def can_exit(self, point):
-        '''Check if exit is next to a point'''
-        for move in Directions:
-            if self.getpoint(*move.move(point)) == Field.EXIT:
-                return move
-        return None
+        '''Check if exit is next to a point with linear index in the grid'''
+        code = self.grid.exit_move(point)
+        return None if code is None else Directions(code)
 
 
-    def createfirst(self):
-        '''Create first correct path to exit by walking by the wall'''
-        point = self.start
+    def createfirst(self, termination = None):
+        '''Create first correct path to exit by walking by the wall
+
+        The walk turns only at walls, so it may never get to the exit.
+        termination -- Termination policy of the search; when it is done
+            before the exit is found, the path is created by createguided()'''
+        point = self.grid.start
+        offsets = self.grid.offsets
+        cells = self.grid.cells
         path = []
         direction = random.choice(list(Directions))
         while self.can_exit(point) == None:
-            if self.getpoint(*direction.move(point)) != Field.WALL:
+            if termination is not None and termination.done():
+                return self.createguided()
+            if cells[point + offsets[direction.value]] != WALL:
                 path.append(direction)
-                point = direction.move(point)
+                point += offsets[direction.value]
             else:
                 direction = turn(direction)
         path.append(self.can_exit(point))
@@ -86,61 +112,106 @@ class Maze:
         return path
 
 
-    def tabusearch(self, t, tabu_limit, unchanged_limit = 1):
+    def createguided(self, noise = 0.2):
+        '''Create first path to exit by random walk descending the distance field'''
+        return reduce_path([Directions(c) for c in self.grid.guided_path(noise)])
+
+
+    def shortest_path(self):
+        '''Find the shortest path to exit by breadth-first search'''
+        return [Directions(c) for c in self.grid.descend(self.grid.start)]
+
+
+    def optimum(self):
+        '''Return length of the shortest path to exit'''
+        return int(self.grid.distances()[self.grid.start])
+
+
+    def repair(self, path):
+        '''Lead the path to exit by the shortest way from its last field before a wall'''
+        if isinstance(path, RunPath):
+            return RunPath.from_moves(self.grid.repair(path.moves())).reduce()
+        return reduce_path([Directions(c) for c in self.grid.repair(b''.join(path))])
+
+
+    def runs(self, path):
+        '''Encode list of Directions as RunPath'''
+        return RunPath.from_moves(b''.join(path))
+
+
+    def directions(self, path):
+        '''Decode RunPath to list of Directions'''
+        return [Directions(c) for c in path.moves()]
+
+
+    def tabusearch(self, t, tabu_limit, unchanged_limit = 1, termination = None,
+                   construction = 'walk', strategy = 'best', aspiration = False):
         '''Run Tabu Search for maze escape
         t -- max time to run
         tabu_limit -- max number of elements in tabu list
-        unchanged_limit -- number of trials to stop when result is unchanged'''
-        endtime = time() + t
-        n = len(self.grid)
-        best = self.createfirst()
-        tabu_list = []
+        unchanged_limit -- number of trials to stop when result is unchanged
+        termination -- Termination policy to use instead of time limit t
+        construction -- first path by walking by the wall ('walk') or by
+            descending the distance field to exit ('bfs')
+        strategy -- move to the best non-tabu neighbor ('best') or stop
+            the scan of neighbors at the first one better than the best path ('first')
+        aspiration -- allow tabu neighbors better than the best path
+        Return the best path as list of Directions.'''
+        termination = (termination or Termination(t)).start(self.stats)
+        n = self.grid.rows
+        with self.stats.phase('construction'):
+            best = self.createguided() if construction == 'bfs' else self.createfirst(termination)
+        best = self.runs(best)
+        tabu_list = TabuList(tabu_limit)
         unchanged = 0
 
-        while time() <= endtime:
-            while len(tabu_list) > tabu_limit:
-                tabu_list.pop(0)
-            neighborhood = self.getneighbors(best)
+        while not termination.done():
+            best_cost = self.cost(best)
             best_candidate = None
-            for candidate in neighborhood:
-                if candidate not in tabu_list:
-                    if self.cost(candidate) < self.cost(best_candidate):
-                        best_candidate = candidate.copy()
-                        tabu_list.append(best_candidate)
-            if self.cost(best_candidate) < self.cost(best):
-                best = best_candidate.copy()
+            candidate_cost = float('inf')
+            for candidate in self.neighbors(best):
+                key = hash(candidate)
+                if key in tabu_list and not (aspiration and candidate.cost < best_cost):
+                    continue
+                if candidate.cost < candidate_cost:
+                    best_candidate = candidate
+                    candidate_cost = candidate.cost
+                    tabu_list.add(key)
+                    if strategy == 'first' and candidate_cost < best_cost:
+                        break
+            self.stats.iterations += 1
+            if candidate_cost < best_cost:
+                best = best_candidate
                 unchanged = 0
+                self.stats.accepted += 1
+                self.stats.improvements += 1
             else:
                 unchanged += 1
             if unchanged > unchanged_limit:
                 break
 
-        print(self.cost(best))
-        print_path(best)
+        return self.directions(best)
 
 
     def getneighbors(self, path):
-        '''Calculate neighbors of the path'''
-        neighborhood = []
-        i = 0
-        while i < len(path) - 1:
-            start_first = i
-            while i + 2 < len(path) and path[i] == path[i+1]:
-                i += 1
-            i += 1
-            start_second = i
-            while i + 2 < len(path) and path[i] == path[i+1]:
-                i += 1
-            end_second = i + 1
-            if i + 1 >= len(path):
-                break
-            new_path = path[:start_first] + path[start_second:end_second] + path[start_first:start_second] + path[end_second:]
-            reduce_path(new_path)
-            try:
-                if self.getpoint(*self.walk(new_path)) == Field.EXIT:
-                    neighborhood.append(new_path)
-            except WallException as e:
-                pass
-            i = start_second
-
-        return neighborhood
+        '''Calculate neighbors of the RunPath'''
+        return list(self.neighbors(path))
+
+
+    def neighbors(self, path):
+        '''Generate neighbors of the RunPath leading to exit
+
+        Every neighbor has two consecutive runs of equal moves exchanged and
+        is walked run by run only when it is taken, which also sets its cost.'''
+        cells = self.grid.cells
+        for i in range(len(path.codes) - 1):
+            new_path = path.copy().exchange(i, i+1, i+2)
+            if self.repair_walls:
+                new_path = self.repair(new_path)
+            self.stats.evaluations += 1
+            if new_path.points:
+                self.stats.add('resumed_walks')
+            end = self.grid.walk_runs(new_path)
+            if end is not None and cells[end[0]] == EXIT:
+                new_path.cost = end[1]
+                yield new_path
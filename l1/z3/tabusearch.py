@@ -1,27 +1,86 @@
+import argparse
+import sys
+from functools import partial
+
 from enums import *
 from maze import *
+from common.instrumentation import Stats
+from common.mazebatch import job_grid, read_instances, solve_batch, write_results
+from common.mazegrid import MazeGrid, parse_grid
+from common.seeding import seed_from_env
+from common.termination import Termination
+
+
+def search(maze, t, n, m, args):
+    '''Search for the path to exit as set by arguments and record its gap if asked'''
+    if args.exact:
+        with maze.stats.phase('search'):
+            best = maze.shortest_path()
+    else:
+        best = maze.tabusearch(t, n+m, termination=Termination.from_env(t),
+                               construction=args.construction, strategy=args.strategy,
+                               aspiration=args.aspiration)
+    if args.gap:
+        with maze.stats.phase('optimum'):
+            optimum = maze.optimum()
+        maze.stats.result('optimum', optimum)
+        maze.stats.result('gap', maze.cost(best) - optimum)
+    return best
+
+
+def solve(instance, agent, args):
+    '''Solve maze of the batch from the agent
+
+    Return cost and moves of the path found with stats of the search.'''
+    t, n, m = instance.header[:3]
+    maze = Maze(job_grid(instance, agent), agent, None)
+    maze.repair_walls = args.repair
+    best = search(maze, t, n, m, args)
+    return maze.cost(best), ''.join(map(lambda f: f.move.__name__, best)), maze.stats
 
 
 def main():
     '''Main function of the package'''
-    i = input().split()
+    parser = argparse.ArgumentParser(description='Maze escape with Tabu Search')
+    parser.add_argument('--exact', action='store_true',
+                        help='find the shortest path by breadth-first search instead')
+    parser.add_argument('--construction', default='walk', choices=('walk', 'bfs'),
+                        help='first path by walking by the wall or descending distances to exit')
+    parser.add_argument('--repair', action='store_true',
+                        help='lead neighbors going through a wall to exit instead of dropping them')
+    parser.add_argument('--strategy', default='best', choices=('best', 'first'),
+                        help='move to the best neighbor or to the first one improving the best path')
+    parser.add_argument('--aspiration', action='store_true',
+                        help='allow tabu neighbors better than the best path')
+    parser.add_argument('--gap', action='store_true',
+                        help='report the shortest path length and gap of the result with stats')
+    parser.add_argument('--batch', action='store_true',
+                        help='solve every agent of many mazes following one another in the input '
+                             'and print "maze agent cost path" lines as they are solved')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes solving the batch, all CPU cores by default')
+    args = parser.parse_args()
+    seed = seed_from_env()
+    if args.batch:
+        stats = Stats('maze tabu search batch')
+        write_results(solve_batch(partial(solve, args=args), read_instances(sys.stdin.buffer),
+                                  args.workers, seed), stats)
+        stats.report()
+        return
+
+    header, data = sys.stdin.buffer.read().split(b'\n', 1)
+    i = header.split()
     t = int(i[0])
     n = int(i[1])
     m = int(i[2])
 
-    grid = []
-    start = -1
-    exit = -1
-    for i in range(n):
-        row = list(map(lambda u: Field(int(u)), input().replace('\r', '')))
-        if Field.AGENT in row:
-            start = (i, row.index(Field.AGENT))
-        if Field.EXIT in row:
-            exit = (i, row.index(Field.EXIT))
-        grid.append(row)
-
-    maze = Maze(grid, start, exit)
-    maze.tabusearch(t, n+m)
+    grid = MazeGrid(parse_grid(data, n, m)[0])
+    maze = Maze(grid, grid.position(grid.start), grid.position(grid.exit))
+    maze.repair_walls = args.repair
+    best = search(maze, t, n, m, args)
+    print(maze.cost(best))
+    print_path(best)
+    maze.stats.report()
 
 
 if __name__ == '__main__':
@@ -4,8 +4,17 @@ Finding minimum of Salomon function with simulated annealing.
 Author: Patryk Barczak
 """
 import math
+import os
 import random
-import time
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.functions import salomon
+from common.instrumentation import Stats
+from common.seeding import seed_from_env
+from common.termination import Termination
 
 
 START_TEMP = 10*10
@@ -14,13 +23,6 @@ COOLING_CONST = 0.6
 PROBABILITY_CONST = 1
 
 
-def salomon(*args):
-    """Calculate Salomon function value in point x = (args)."""
-    norm = math.sqrt(sum(map(lambda u: u*u, args)))
-    result = 1 - math.cos(2*math.pi*norm) + 0.1*norm
-    return result
-
-
 def get_probability(delta, temp):
     """Calculate probability based on delta and temperature.
 
@@ -43,9 +45,8 @@ def cooling_schedule(temp):
 
 def random_direction(dimensions):
     """Find new function arguments to check."""
-    vector = [random.gauss(0, 0.5) for _ in range(dimensions)]
-    mag = math.sqrt(sum(map(lambda u: u*u, vector)))
-    return tuple(x/mag for x in vector)
+    vector = np.random.normal(0, 0.5, dimensions)
+    return vector/np.linalg.norm(vector)
 
 
 def get_delta(function, current_args, candidate_args):
@@ -54,7 +55,7 @@ def get_delta(function, current_args, candidate_args):
     Delta is a difference in function value between check_args and
     current_args.
     """
-    return function(*candidate_args) - function(*current_args)
+    return function(candidate_args) - function(current_args)
 
 
 def get_step(args):
@@ -69,34 +70,39 @@ def new_candidate(args):
     """Find new function arguments to check."""
     direction = random_direction(len(args))
     step = get_step(args)
-    vector = [step*x for x in direction]
-    result = tuple(map(sum, zip(args, vector)))
-    return result
+    return np.asarray(args) + step*direction
 
 
-def simulated_annealing(function, time_limit, *start_args):
+def simulated_annealing(function, time_limit, *start_args, stats=None, termination=None):
     """Perform simulated annealing algorithm to find function's minimum.
 
-    -- function - function to find minimum in
+    -- function - function of a point to find minimum in
     -- time_limit - limit of time to stop searching in seconds
     -- *start_args - coordinates of the starting point
+    -- stats - Stats to count evaluations and iterations in
+    -- termination - Termination policy to use instead of time_limit
     """
+    stats = stats or Stats('simulated annealing')
+    function = stats.count(function)
     temp = START_TEMP
     result_args = start_args
     current = start_args
-    current_val = function(*current)
+    current_val = function(current)
     result_val = current_val
-    end_time = time.time() + time_limit
+    termination = (termination or Termination(time_limit)).start(stats)
 
-    while time.time() < end_time:
+    while not termination.done():
         candidate = new_candidate(current)
-        candidate_val = function(*candidate)
+        candidate_val = function(candidate)
         delta = candidate_val - current_val
+        stats.iterations += 1
         if get_probability(delta, temp) > random.random():
             current, current_val = candidate, candidate_val
+            stats.accepted += 1
         temp = cooling_schedule(temp)
-        if function(*current) < function(*result_args):
+        if current_val < result_val:
             result_args, result_val = current, current_val
+            stats.improvements += 1
         if temp <= END_TEMP:
             break
 
@@ -105,12 +111,16 @@ def simulated_annealing(function, time_limit, *start_args):
 
 def main():
     """Find min of Salomon function with input data."""
+    seed_from_env()
     i = input().split()
     time_limit = int(i[0])
     start_args = tuple(map(int, i[1:]))
 
-    result = simulated_annealing(salomon, time_limit, *start_args)
+    stats = Stats('simulated annealing')
+    result = simulated_annealing(salomon, time_limit, *start_args, stats=stats,
+                                 termination=Termination.from_env(time_limit))
     print(' '.join(map(str, result)))
+    stats.report()
 
 
 if __name__ == '__main__':
@@ -7,6 +7,8 @@ import sys
 import numpy as np
 
 from matrix import ClosestMatrixFinder
+from common.seeding import seed_from_env
+from common.termination import Termination
 
 
 def print_matrix(matrix, out=sys.stderr):
@@ -17,6 +19,7 @@ def print_matrix(matrix, out=sys.stderr):
 
 def main():
     """Find the closest matrix M' to matrix M from the input data."""
+    seed_from_env()
     i = input().split()
     time_limit = int(i[0])
     n = int(i[1])
@@ -28,10 +31,11 @@ def main():
         matrix.append(list(map(int, input().split())))
 
     matrix_finder = ClosestMatrixFinder(np.array(matrix, dtype=np.uint8), k)
-    result = matrix_finder.simulated_annealing(time_limit)
+    result = matrix_finder.simulated_annealing(time_limit, Termination.from_env(time_limit))
 
     print_matrix(result.matrix)
     print(matrix_finder.distance_from_original(result.matrix))
+    matrix_finder.stats.report()
 
 
 if __name__ == '__main__':
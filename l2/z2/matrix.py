@@ -1,12 +1,17 @@
 """Implementation of Simulated Annealing for finding closest matrix."""
 
 
-import time
 import random
 import math
 from dataclasses import dataclass
 import numpy as np
 import copy
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.instrumentation import Stats
+from common.termination import Termination
 
 
 START_TEMP = 10**20
@@ -288,9 +293,11 @@ class ClosestMatrixFinder:
         self.cols = len(matrix[0])
         self.original_matrix = matrix
         self.min_block_size = min_block_size
+        self.stats = Stats('closest matrix simulated annealing')
 
     def distance_from_original(self, matrix):
         """Calculate and return the distance between matrix1 and matrix2."""
+        self.stats.evaluations += 1
         return distance(self.original_matrix, matrix)
 
     def get_start_matrix(self):
@@ -305,29 +312,33 @@ class ClosestMatrixFinder:
         """Update temperature value."""
         return geometric_cooling(temp)
 
-    def simulated_annealing(self, time_limit):
+    def simulated_annealing(self, time_limit, termination=None):
         """Perform simulated annealing algorithm to find closest matrix.
 
         -- time_limit - limit of time to stop searching in seconds
+        -- termination - Termination policy to use instead of time_limit
         """
         temp = START_TEMP
         current = self.get_start_matrix()
         current_score = self.distance_from_original(current.matrix)
         result_matrix = current
         result_score = current_score
-        end_time = time.time() + time_limit
+        termination = (termination or Termination(time_limit)).start(self.stats)
         it = 0
 
-        while temp > END_TEMP and time.time() < end_time:
+        while temp > END_TEMP and not termination.done():
             candidate_matrix = self.new_candidate(current)
             candidate_score = self.distance_from_original(candidate_matrix.matrix)
             if get_probability(candidate_score-current_score, temp) > random.random():
                 current = candidate_matrix
                 current_score = candidate_score
+                self.stats.accepted += 1
             temp = self.cooling_schedule(temp)
             if current_score < result_score:
                 result_matrix = current
                 result_score = current_score
+                self.stats.improvements += 1
             it += 1
+            self.stats.iterations += 1
 
         return result_matrix
@@ -3,9 +3,17 @@
 Find the shortest path to an exit in a maze using Simulated Annealing.
 Author: Patryk Barczak
 """
+import argparse
+from functools import partial
+
 from enums import *
 from maze import *
 from simulated_annealing import *
+from common.instrumentation import Stats
+from common.mazebatch import job_grid, read_instances, solve_batch, write_results
+from common.mazegrid import MazeGrid, parse_grid
+from common.seeding import seed_from_env
+from common.termination import Termination
 import sys
 
 
@@ -14,30 +22,71 @@ def print_path(path, file=sys.stderr):
     print(''.join(map(lambda f: f.move.__name__, path)), file=file)
 
 
+def search(maze, time_limit, args):
+    """Search for the path to exit as set by arguments and record its gap if asked."""
+    sim_annealing = SimulatedAnnealing(maze)
+    if args.exact:
+        with maze.stats.phase('search'):
+            path = maze.shortest_path()
+    else:
+        path = sim_annealing.run(time_limit, Termination.from_env(time_limit), args.construction)
+    if args.gap:
+        with maze.stats.phase('optimum'):
+            optimum = maze.optimum()
+        maze.stats.result('optimum', optimum)
+        maze.stats.result('gap', maze.cost(path) - optimum)
+    return path
+
+
+def solve(instance, agent, args):
+    """Solve maze of the batch from the agent.
+
+    Return cost and moves of the path found with stats of the search.
+    """
+    maze = Maze(job_grid(instance, agent), agent, None)
+    maze.repair_walls = args.repair
+    path = search(maze, instance.header[0], args)
+    return maze.cost(path), ''.join(map(lambda f: f.move.__name__, path)), maze.stats
+
+
 def main():
     """Perform simulated annealing on a maze from the input data."""
-    i = input().split()
+    parser = argparse.ArgumentParser(description='Maze escape with Simulated Annealing')
+    parser.add_argument('--exact', action='store_true',
+                        help='find the shortest path by breadth-first search instead')
+    parser.add_argument('--construction', default='walk', choices=('walk', 'bfs'),
+                        help='first paths by random walk or descending distances to exit')
+    parser.add_argument('--repair', action='store_true',
+                        help='lead neighbors going through a wall to exit instead of dropping them')
+    parser.add_argument('--gap', action='store_true',
+                        help='report the shortest path length and gap of the result with stats')
+    parser.add_argument('--batch', action='store_true',
+                        help='solve every agent of many mazes following one another in the input '
+                             'and print "maze agent cost path" lines as they are solved')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes solving the batch, all CPU cores by default')
+    args = parser.parse_args()
+    seed = seed_from_env()
+    if args.batch:
+        stats = Stats('maze simulated annealing batch')
+        write_results(solve_batch(partial(solve, args=args), read_instances(sys.stdin.buffer),
+                                  args.workers, seed), stats)
+        stats.report()
+        return
+
+    header, data = sys.stdin.buffer.read().split(b'\n', 1)
+    i = header.split()
     time_limit = int(i[0])
     n = int(i[1])
     m = int(i[2])
 
-    grid = []
-    start_field = -1
-    exit_field = -1
-    for i in range(n):
-        row = list(map(lambda u: Field(int(u)), input().replace('\r', '')))
-        if Field.AGENT in row:
-            start_field = (i, row.index(Field.AGENT))
-        if Field.EXIT in row:
-            exit_field = (i, row.index(Field.EXIT))
-        grid.append(row)
-
-    maze = Maze(grid, start_field, exit_field)
-    sim_annealing = SimulatedAnnealing(maze)
-    path = sim_annealing.run(time_limit)
-
+    grid = MazeGrid(parse_grid(data, n, m)[0])
+    maze = Maze(grid, grid.position(grid.start), grid.position(grid.exit))
+    maze.repair_walls = args.repair
+    path = search(maze, time_limit, args)
     print(maze.cost(path))
     print_path(path)
+    maze.stats.report()
 
 
 if __name__ == '__main__':
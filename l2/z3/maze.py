@@ -1,7 +1,14 @@
 """Maze implementation."""
+import os
 import random
+import sys
 from enums import *
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.instrumentation import Stats
+from common.mazegrid import MazeGrid, EXIT, WALL
+from common.runpath import RunPath
+
 
 class WallException(Exception):
     """Wall exception raised when agent walks into maze wall."""
@@ -31,71 +38,116 @@ class Maze:
     """Maze escape solver with Simulated Annealing algorithm."""
 
     def __init__(self, grid, start, exit):
-        """Initialize maze with the grid and positions of start and exit"""
-        self.grid = grid
+        """Initialize maze with the grid and positions of start and exit
+
+        grid -- rows of Fields or MazeGrid
+        """
+        self.grid = grid if isinstance(grid, MazeGrid) else MazeGrid(grid, start, exit)
         self.start = start
         self.exit = exit
+        self.stats = Stats('maze')
+        self.repair_walls = False
 
     def get_point(self, i, j):
         """Get field type on the (i,j)"""
-        return self.grid[i][j]
+        return Field(self.grid.field(i, j))
 
     def cost(self, path):
-        """Calculate cost of the path"""
-        if path is None or self.get_point(*self.walk(path)[0]) != Field.EXIT:
+        """Calculate cost of the path
+
+        Cost of a RunPath is cached on it, so every path is walked at most once."""
+        if path is None:
             return float('inf')
-        return len(path)
+        if isinstance(path, RunPath) and path.cost is not None:
+            return path.cost
+        cost = float('inf') if self.get_point(*self.walk(path)[0]) != Field.EXIT else len(path)
+        if isinstance(path, RunPath):
+            path.cost = cost
+        return cost
 
     def walk(self, path):
-        """Walk the path from the start point"""
-        point = self.start
-        walked = []
-        for move in path:
-            point = move.move(point)
-            if self.get_point(*point) == Field.WALL:
+        """Walk the path (list of Directions or RunPath) from the start point"""
+        self.stats.evaluations += 1
+        if isinstance(path, RunPath):
+            end = self.grid.walk_runs(path, stop_at_exit=True)
+            if end is None:
                 raise WallException
-            walked.append(move)
-            if self.get_point(*point) == Field.EXIT:
-                break
-        return point, walked
+            return self.grid.position(end[0]), path.copy().truncate(end[1])
+        end = self.grid.walk(b''.join(path), stop_at_exit=True)
+        if end is None:
+            raise WallException
+        return self.grid.position(end[0]), path[:end[1]]
 
     def can_exit(self, point):
-        """Check if exit is next to a point"""
-        for move in Directions:
-            if self.get_point(*move.move(point)) == Field.EXIT:
-                return move
-        return None
+        """Check if exit is next to a point with linear index in the grid"""
+        code = self.grid.exit_move(point)
+        return None if code is None else Directions(code)
 
     def create_first(self):
         """Create first correct path to exit.
 
         Path is found by walking in random direction until agent meets wall or randomly (with 5% chance) turns."""
-        point = self.start
+        point = self.grid.start
+        offsets = self.grid.offsets
+        cells = self.grid.cells
         path = []
         direction = random.choice(list(Directions))
         while self.can_exit(point) is None:
-            if self.get_point(*direction.move(point)) == Field.WALL or random.random() < 0.05:
+            if cells[point + offsets[direction.value]] == WALL or random.random() < 0.05:
                 direction = turn(direction)
             else:
                 path.append(direction)
-                point = direction.move(point)
+                point += offsets[direction.value]
         path.append(self.can_exit(point))
         reduce_path(path)
         return path
 
+    def create_guided(self, noise=0.2):
+        """Create first path to exit by random walk descending the distance field."""
+        return reduce_path([Directions(c) for c in self.grid.guided_path(noise)])
+
+    def shortest_path(self):
+        """Find the shortest path to exit by breadth-first search."""
+        return [Directions(c) for c in self.grid.descend(self.grid.start)]
+
+    def optimum(self):
+        """Return length of the shortest path to exit."""
+        return int(self.grid.distances()[self.grid.start])
+
+    def repair(self, path):
+        """Lead the path to exit by the shortest way from its last field before a wall."""
+        if isinstance(path, RunPath):
+            return RunPath.from_moves(self.grid.repair(path.moves())).reduce()
+        return reduce_path([Directions(c) for c in self.grid.repair(b''.join(path))])
+
+    def runs(self, path):
+        """Encode list of Directions as RunPath."""
+        return RunPath.from_moves(b''.join(path))
+
+    def directions(self, path):
+        """Decode RunPath to list of Directions."""
+        return [Directions(c) for c in path.moves()]
+
     def get_random_neighbor(self, path):
-        """Calculate a random neighbor of the path"""
-        if len(path) < 3:
+        """Calculate a random neighbor of the RunPath
+
+        Segments of moves are exchanged on runs and the neighbor is walked run by run."""
+        n = len(path)
+        if n < 3:
             return None
-        first_seq_start = random.randrange(len(path)-2)
-        first_seq_end = random.randrange(first_seq_start+1, len(path)-1)
-        second_seq_start = random.randrange(first_seq_end, len(path)-1)
-        second_seq_end = random.randrange(second_seq_start+1, len(path))
-        new_path = path[:first_seq_start] + path[second_seq_start:second_seq_end] + path[first_seq_start:first_seq_end] + path[second_seq_end:]
-        reduce_path(new_path)
-        try:
-            res = self.walk(new_path)
-            if self.get_point(*res[0]) == Field.EXIT:
-                return res[1]
-        except WallException:
-            pass
+        first_seq_start = random.randrange(n-2)
+        first_seq_end = random.randrange(first_seq_start+1, n-1)
+        second_seq_start = random.randrange(first_seq_end, n-1)
+        second_seq_end = random.randrange(second_seq_start+1, n)
+        new_path = path.copy().exchange_moves(first_seq_start, first_seq_end, second_seq_start, second_seq_end)
+        if self.repair_walls:
+            new_path = self.repair(new_path)
+        self.stats.evaluations += 1
+        if new_path.points:
+            self.stats.add('resumed_walks')
+        end = self.grid.walk_runs(new_path, stop_at_exit=True)
+        if end is not None and self.grid.cells[end[0]] == EXIT:
+            new_path.truncate(end[1])
+            new_path.cost = end[1]
+            return new_path
+        return None
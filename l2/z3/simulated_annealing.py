@@ -1,11 +1,15 @@
 """Simulated Anneling implementation for finding the shortest way to exit from a maze."""
 
 
-import time
 import math
+import os
 import random
+import sys
 from enums import *
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.termination import Termination
+
 START_TEMP = 10**10
 COOLING_CONST = 0.99
 END_TEMP = 0.1  # 1e-10
@@ -29,6 +33,8 @@ class SimulatedAnnealing:
     def __init__(self, maze):
         """Initialize new instance with a maze to search in."""
         self.maze = maze
+        self.stats = maze.stats
+        self.stats.solver = 'maze simulated annealing'
 
     def get_delta(self, current, candidate):
         """Calculate delta end return it.
@@ -42,32 +48,41 @@ class SimulatedAnnealing:
         """Update temperature in SA algorithm."""
         return COOLING_CONST*temp
 
-    def run(self, time_limit):
+    def run(self, time_limit, termination=None, construction='walk'):
         """Run Simulated Annealing for maze escape.
 
-        Return shortest path found during algorithm run.
+        Return shortest path found during algorithm run; it is searched as
+        a RunPath and returned as a list of Directions.
         time_limit -- max time to run
+        termination -- Termination policy to use instead of time_limit
+        construction -- first paths by random walk ('walk') or by descending
+            the distance field to exit ('bfs')
         """
-        end_time = time.time() + time_limit
-        current = self.maze.create_first()
+        termination = (termination or Termination(time_limit)).start(self.stats)
+        create = self.maze.create_guided if construction == 'bfs' else self.maze.create_first
+        with self.stats.phase('construction'):
+            current = self.maze.runs(create())
         result = current
-        temp = len(self.maze.grid)*len(self.maze.grid[0])
+        temp = self.maze.grid.rows*self.maze.grid.cols
         result_it = 0
 
-        while time.time() <= end_time:
+        while not termination.done():
             candidate = self.maze.get_random_neighbor(current)
             delta = self.get_delta(current, candidate)
+            self.stats.iterations += 1
             if get_probability(delta, temp) > random.random():
                 current = candidate
+                self.stats.accepted += 1
             if self.maze.cost(result) > self.maze.cost(current):
                 result = current
                 result_it = 0
+                self.stats.improvements += 1
             temp = self.cooling_schedule(temp)
             if temp <= END_TEMP:
                 result_it += 1
                 if result_it >= UNCHANGED_RESULT_ITERATIONS:
                     break
-                current = self.maze.create_first()
+                current = self.maze.runs(create())
                 temp = START_TEMP
 
-        return result
+        return self.maze.directions(result)
@@ -4,12 +4,19 @@ Finding minimum of X. S. Yang function with Particle Swarm Optimization algorith
 
 Author: Patryk Barczak
 """
+import os
 import random
-import time
+import sys
 from dataclasses import dataclass
 
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.functions import yang
+from common.instrumentation import Stats
+from common.seeding import seed_from_env
+from common.termination import Termination
+
 
 POPULATION_SIZE = 100
 DIMENSION = 5
@@ -19,11 +26,6 @@ PARTICLE_BEST_COEF = 0.3
 GLOBAL_BEST_COEF = 1.5
 
 
-def yang(coefs, args):
-    """Calculate X. S. Yang function value in point x = (args) with given coefficients."""
-    return sum(coefs*abs(args))
-
-
 @dataclass
 class Particle:
     """Class representing single particle in the PSO algorithm."""
@@ -109,7 +111,8 @@ class PSO:
         - brake_coef, particle_best_coef, global_best_coef -- coefficients
             for recalculating particles' velocities
         """
-        self.objective_fn = objective_fn
+        self.stats = Stats('particle swarm optimization')
+        self.objective_fn = self.stats.count(objective_fn)
         self.brake_coef = brake_coef
         self.particle_best_coef = particle_best_coef
         self.global_best_coef = global_best_coef
@@ -137,14 +140,9 @@ class PSO:
         Position is updated and corrected if it exceeds boundary.
         After this, particle's cost is recalculated, too.
         """
-        particle.position = particle.position + particle.velocity
-        for i in range(len(particle.position)):
-            if particle.position[i] > boundary:
-                particle.position[i] = boundary
-                particle.velocity[i] *= -1
-            if particle.position[i] < -boundary:
-                particle.position[i] = -boundary
-                particle.velocity[i] *= -1
+        position = particle.position + particle.velocity
+        particle.velocity[np.abs(position) > boundary] *= -1
+        particle.position = np.clip(position, -boundary, boundary)
         particle.update_cost()
 
     def update_population(self, population, global_best_position):
@@ -158,18 +156,24 @@ class PSO:
             self.update_velocity(particle, global_best_position)
             self.update_position(particle)
 
-    def search(self, time_limit):
+    def search(self, time_limit, termination=None):
         """Search for global minimum using PSO algorithm.
 
         - time_limit -- time limit for algorithm in seconds
+        - termination -- Termination policy to use instead of time_limit
         """
-        end_time = time.time() + time_limit
-        population = self.generate_population()
+        termination = (termination or Termination(time_limit)).start(self.stats)
+        with self.stats.phase('initialization'):
+            population = self.generate_population()
         global_best = get_global_best(population)
 
-        while time.time() < end_time:
+        while not termination.done():
+            best_cost = global_best.best_cost
             self.update_population(population, global_best.best_position)
             global_best = get_global_best(population, global_best)
+            self.stats.iterations += 1
+            if global_best.best_cost < best_cost:
+                self.stats.improvements += 1
 
             if check_stop_condition(population):
                 break
@@ -179,17 +183,19 @@ class PSO:
 
 def find_minimum():
     """Find minimum of Yang function with input data."""
+    seed_from_env()
     i = input().split()
     time_limit = int(i[0])
     coefs = np.array(tuple(map(float, i[6:])))
 
     def defined_yang(args):
-        return yang(coefs, args)
+        return yang(args, coefs)
 
     pso = PSO(defined_yang)
 
-    result = pso.search(time_limit)
+    result = pso.search(time_limit, Termination.from_env(time_limit))
     print(' '.join(list(map(str, result[0]))), result[1])
+    pso.stats.report()
 
 
 if __name__ == '__main__':
@@ -2,8 +2,13 @@
 
 Implementation of genetic algorithm for finding best matching word.
 """
-import time
 import random
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.instrumentation import Stats
+from common.termination import Termination
 
 
 CROSSOVER_PROB = 0.98
@@ -21,9 +26,11 @@ class GeneticAlgorithm:
         """
         self.matcher = matcher
         self.population_size = population_size
+        self.stats = Stats('word genetic algorithm')
 
     def objective_function(self, element):
         """Objective function to optimize (find its maximum)."""
+        self.stats.evaluations += 1
         return self.matcher.fitness(element)
 
     def get_population_best(self, population):
@@ -93,20 +100,25 @@ class GeneticAlgorithm:
             children.append(child)
         return children
 
-    def search(self, time_limit, initial_population):
+    def search(self, time_limit, initial_population, termination=None):
         """Search for the best matching element.
 
         Search by optimization of the objective function using
         genetic algorithm.
+        - termination -- Termination policy to use instead of time_limit
         """
         population = initial_population
-        end_time = time.time() + time_limit
+        termination = (termination or Termination(time_limit)).start(self.stats)
         best = self.get_population_best(population)
 
-        while time.time() < end_time:
+        while not termination.done():
             parents = self.select_parents(population, self.population_size)
             children = self.reproduce(parents)
             population = children
+            current_best = best
             best = self.get_better(best, self.get_population_best(population))
+            self.stats.iterations += 1
+            if best is not current_best:
+                self.stats.improvements += 1
 
         return best
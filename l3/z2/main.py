@@ -13,20 +13,23 @@ import time
 from genetic import GeneticAlgorithm
 from trie import Trie
 from word_matcher import WordMatcher
+from common.seeding import seed_from_env
+from common.termination import Termination
 
 
 dirname = os.path.dirname(__file__)
 DICT_FILENAME = os.path.join(dirname, 'dict.txt')
 
 
-def read_dict(multiset):
+def read_dict(multiset, filename=DICT_FILENAME):
     """Read words from dictionary file into the Trie.
 
     Words are inserted into the Trie only if they are made of chars from multiset.
     - multiset -- multiset of chars with number of their possible occurrences and points
+    - filename -- path of the dictionary file
     """
     trie = Trie(multiset)
-    with open(DICT_FILENAME, 'r') as file:
+    with open(filename, 'r') as file:
         word = file.readline()
         while word:
             trie.insert(word.replace('\n', '').lower())
@@ -35,7 +38,11 @@ def read_dict(multiset):
 
 
 def find_best_match():
-    """Find the best matching word from the dictionary."""
+    """Find the best matching word from the dictionary.
+
+    Path of the dictionary file can be given as the first argument.
+    """
+    seed_from_env()
     i = input().split()
     time_limit = int(i[0])
     letter_multiset_size = int(i[1])
@@ -54,15 +61,17 @@ def find_best_match():
     for _ in range(initial_size):
         initial_words.append(input().replace('\r', ''))
 
-    trie = read_dict(multiset)
+    trie = read_dict(multiset, *sys.argv[1:2])
     matcher = WordMatcher(trie)
     genetic = GeneticAlgorithm(matcher)
 
     preprocessing_time = time.time() - start_time
-    result = genetic.search(time_limit - preprocessing_time, initial_words)
+    search_time = time_limit - preprocessing_time
+    result = genetic.search(search_time, initial_words, Termination.from_env(search_time))
 
     print(result, file=sys.stderr)
     print(matcher.fitness(result))
+    genetic.stats.report()
 
 
 if __name__ == '__main__':
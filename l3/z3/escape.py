@@ -4,11 +4,18 @@ Find the shortest path to an exit in a maze using Genetic Algorithm.
 
 Author: Patryk Barczak
 """
+import argparse
 import sys
+from functools import partial
 
 from enums import *
 from maze import Maze
 from genetic import GeneticAlgorithm
+from common.instrumentation import Stats
+from common.mazebatch import job_grid, read_instances, solve_batch, write_results
+from common.mazegrid import MazeGrid, parse_grid
+from common.seeding import seed_from_env
+from common.termination import Termination
 
 
 def print_path(path, file=sys.stderr):
@@ -30,38 +37,99 @@ def path_map(s):
             return d
 
 
+def search(maze, time_limit, initial_paths, population_size, args):
+    """Search for the path to exit as set by arguments and record its gap if asked.
+
+    Without initial paths the whole population of the genetic algorithm is
+    constructed.
+    Return the path and its cost.
+    """
+    genetic = GeneticAlgorithm(maze, population_size)
+    if args.exact:
+        with maze.stats.phase('search'):
+            path = maze.shortest_path()
+        result = path, maze.cost(path)
+    else:
+        if args.construction == 'bfs' or not initial_paths:
+            create = maze.create_guided if args.construction == 'bfs' else maze.create_first
+            with maze.stats.phase('construction'):
+                for _ in range(population_size - len(initial_paths)):
+                    initial_paths.append(create())
+        unchanged_iterations = 10*(maze.grid.rows*maze.grid.cols)
+        termination = Termination.from_env(time_limit, stagnation=unchanged_iterations)
+        result = genetic.search(time_limit, initial_paths, unchanged_iterations, termination)
+
+    if args.gap:
+        with maze.stats.phase('optimum'):
+            optimum = maze.optimum()
+        maze.stats.result('optimum', optimum)
+        maze.stats.result('gap', result[1] - optimum)
+    return result
+
+
+def solve(instance, agent, args):
+    """Solve maze of the batch from the agent.
+
+    Initial paths of the input are used only in mazes with one agent, since
+    they start from it.
+    Return cost and moves of the path found with stats of the search.
+    """
+    maze = Maze(job_grid(instance, agent), agent, None)
+    maze.repair_walls = args.repair
+    initial_paths = []
+    if len(instance.agents()) == 1:
+        initial_paths = [path_from_string(line) for line in instance.extra]
+    path, cost = search(maze, instance.header[0], initial_paths, instance.header[4], args)
+    return cost, ''.join(map(lambda f: f.move.__name__, path)), maze.stats
+
+
 def escape():
     """Perform genetic algorithm on a maze from the input data."""
-    i = list(map(int, input().split()))
+    parser = argparse.ArgumentParser(description='Maze escape with Genetic Algorithm')
+    parser.add_argument('--exact', action='store_true',
+                        help='find the shortest path by breadth-first search instead')
+    parser.add_argument('--construction', default='walk', choices=('walk', 'bfs'),
+                        help='fill population with paths descending distances to exit (bfs)')
+    parser.add_argument('--repair', action='store_true',
+                        help='lead neighbors going through a wall to exit instead of dropping them')
+    parser.add_argument('--gap', action='store_true',
+                        help='report the shortest path length and gap of the result with stats')
+    parser.add_argument('--batch', action='store_true',
+                        help='solve every agent of many mazes following one another in the input '
+                             'and print "maze agent cost path" lines as they are solved')
+    parser.add_argument('--workers', type=int,
+                        help='number of processes solving the batch, all CPU cores by default')
+    args = parser.parse_args()
+    seed = seed_from_env()
+    if args.batch:
+        stats = Stats('maze genetic algorithm batch')
+        instances = read_instances(sys.stdin.buffer, extra_lines=lambda header: header[3])
+        write_results(solve_batch(partial(solve, args=args), instances, args.workers, seed), stats)
+        stats.report()
+        return
+
+    header, data = sys.stdin.buffer.read().split(b'\n', 1)
+    i = list(map(int, header.split()))
     time_limit = i[0]
     n = i[1]
     m = i[2]
     initial_size = i[3]
     population_size = i[4]
 
-    grid = []
-    start_field = -1
-    exit_field = -1
-    for i in range(n):
-        row = list(map(lambda u: Field(int(u)), input().replace('\r', '')))
-        if Field.AGENT in row:
-            start_field = (i, row.index(Field.AGENT))
-        if Field.EXIT in row:
-            exit_field = (i, row.index(Field.EXIT))
-        grid.append(row)
-
-    maze = Maze(grid, start_field, exit_field)
+    grid, data = parse_grid(data, n, m)
+    grid = MazeGrid(grid)
+    maze = Maze(grid, grid.position(grid.start), grid.position(grid.exit))
+    maze.repair_walls = args.repair
 
+    lines = data.decode().splitlines()
     initial_paths = []
     for i in range(initial_size):
-        initial_paths.append(path_from_string(input().replace('\r', '')))
-
-    genetic = GeneticAlgorithm(maze, population_size)
-    unchanged_iterations = 10*(n*m)
-    result = genetic.search(time_limit, initial_paths, unchanged_iterations)
+        initial_paths.append(path_from_string(lines[i].strip()))
 
+    result = search(maze, time_limit, initial_paths, population_size, args)
     print(result[1])
     print_path(result[0])
+    maze.stats.report()
 
 
 if __name__ == '__main__':
@@ -2,8 +2,12 @@
 
 Implementation of genetic algorithm for finding the shortest path to escape from a maze.
 """
-import time
+import os
 import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from common.termination import Termination
 
 
 class GeneticAlgorithm:
@@ -17,15 +21,21 @@ class GeneticAlgorithm:
         """
         self.maze = maze
         self.population_size = population_size
+        self.stats = maze.stats
+        self.stats.solver = 'maze genetic algorithm'
 
     def cost_function(self, element):
         """Cost function to optimize (find its minimum)."""
         return self.maze.cost(element)
 
     def get_best(self, population):
-        """Return the best element from the current population."""
-        best = min(population, key=self.cost_function)
-        return best, self.cost_function(best)
+        """Return the best element from the current population.
+
+        Costs of all elements are calculated together by the maze.
+        """
+        costs = self.maze.costs(population)
+        k = min(range(len(population)), key=costs.__getitem__)
+        return population[k], costs[k]
 
     def get_global_best(self, b1, b2):
         """Return the better element which is global best.
@@ -75,31 +85,32 @@ class GeneticAlgorithm:
             children.append(child)
         return children
 
-    def search(self, time_limit, initial_population, max_unchanged_it):
+    def search(self, time_limit, initial_population, max_unchanged_it, termination=None):
         """Search for the shortest path.
 
         Search by optimization of the objective function (minimising cost function)
         using genetic algorithm.
+        - termination -- Termination policy to use instead of time_limit
+            and max_unchanged_it
+        Paths are evolved as RunPaths and the best one is returned as
+        a list of Directions with its cost.
         """
         population = []
         for e in initial_population:
             w = self.maze.walk(e)[1]
-            population.append(w)
-        end_time = time.time() + time_limit
+            population.append(self.maze.runs(w))
+        termination = termination or Termination(time_limit, stagnation=max_unchanged_it)
+        termination.start(self.stats)
         best = self.get_best(population)
-        it = 0
 
-        while time.time() < end_time:
+        while not termination.done():
             parents = self.select_parents(population)
             children = self.reproduce(parents)
             population = children
             current_best = best
             best = self.get_global_best(best, self.get_best(population))
-            if current_best == best:
-                it += 1
-                if it >= max_unchanged_it:
-                    break
-            else:
-                it = 0
+            self.stats.iterations += 1
+            if current_best != best:
+                self.stats.improvements += 1
 
-        return best
+        return self.maze.directions(best[0]), best[1]